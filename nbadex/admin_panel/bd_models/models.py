@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import logging
 from datetime import timedelta
 from typing import Iterable, cast
 
@@ -9,8 +10,11 @@ from django.db import models
 from django.utils.safestring import SafeText, mark_safe
 from django.utils.timezone import now
 
+from ballsdex.core.image_generator.wild_cards import optimize_wild_card
 from ballsdex.settings import settings
 
+log = logging.getLogger(__name__)
+
 
 def transform_media(path: str) -> str:
     return path.replace("/static/uploads/", "").replace(
@@ -261,7 +265,14 @@ class Ball(models.Model):
         self.catch_names = lower_catch_names(self.catch_names)
         self.translations = lower_catch_names(self.translations)
 
-        return super().save(force_insert, force_update, using, update_fields)
+        super().save(force_insert, force_update, using, update_fields)
+
+        # the bot uploads this copy instead of the original when spawning
+        if settings.wild_card_max_size > 0 and self.wild_card:
+            try:
+                optimize_wild_card(self.wild_card.path)
+            except Exception:
+                log.exception(f"Failed to optimize the spawn image of {self.country}")
 
     class Meta:
         managed = True
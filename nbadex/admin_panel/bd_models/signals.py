@@ -0,0 +1,44 @@
+import json
+import logging
+import time
+from functools import partial
+
+from django.db import connection, transaction
+from django.db.models import Model
+from django.db.models.signals import post_delete, post_save
+
+from .models import Ball, Economy, Regime, Special
+
+log = logging.getLogger(__name__)
+
+# must match the channel listened by the bot, see ballsdex/core/catalog.py
+CHANNEL = "ballsdex_catalog"
+
+
+def notify(model: str, pk: int, deleted: bool):
+    payload = json.dumps({"model": model, "id": pk, "deleted": deleted, "time": time.time()})
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [CHANNEL, payload])
+    except Exception:
+        # the bot will still pick the change on its next full reload
+        log.exception(f"Failed to notify the bot of the change of {model} {pk}")
+
+
+def catalog_saved(sender: type[Model], instance: Model, **kwargs):
+    # sent after the commit, the bot would otherwise read the previous row
+    transaction.on_commit(partial(notify, sender.__name__, instance.pk, False))
+
+
+def catalog_deleted(sender: type[Model], instance: Model, **kwargs):
+    transaction.on_commit(partial(notify, sender.__name__, instance.pk, True))
+
+
+def connect_signals():
+    if connection.vendor != "postgresql":
+        return
+    for model in (Ball, Regime, Economy, Special):
+        post_save.connect(catalog_saved, sender=model, dispatch_uid=f"notify-{model.__name__}")
+        post_delete.connect(
+            catalog_deleted, sender=model, dispatch_uid=f"notify-delete-{model.__name__}"
+        )
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class PreviewConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "preview"
+
+    def ready(self):
+        from .signals import connect_signals
+
+        connect_signals()
@@ -0,0 +1,102 @@
+import asyncio
+import statistics
+import time
+from io import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from ballsdex.core.image_generator.image_gen import EncoderOptions, draw_card
+from ballsdex.core.models import Ball, BallInstance, Special
+from ballsdex.settings import settings
+
+from ...utils import refresh_cache
+
+OPTIONS = (
+    EncoderOptions("WEBP", quality=80, method=0),
+    EncoderOptions("WEBP", quality=80, method=4),
+    EncoderOptions("WEBP", quality=80, method=6),
+    EncoderOptions("WEBP", quality=60, method=4),
+    EncoderOptions("WEBP", quality=90, method=4),
+    EncoderOptions("WEBP", quality=80, method=4, scale=0.5),
+    EncoderOptions("WEBP", quality=80, method=4, scale=0.25),
+    EncoderOptions("WEBP", method=0, lossless=True),
+    EncoderOptions("WEBP", method=4, lossless=True),
+    EncoderOptions("PNG"),
+    EncoderOptions("JPEG", quality=80),
+    EncoderOptions("JPEG", quality=90),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the encoding time and file size of the cards for multiple encoder settings, "
+        "using the media uploaded on the admin panel."
+    )
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument(
+            "--count",
+            type=int,
+            default=20,
+            help=f"Number of {settings.plural_collectible_name} to render, defaults to 20.",
+        )
+        parser.add_argument(
+            "--special",
+            help="The special event's background to use, otherwise regime is used",
+        )
+
+    def describe(self, options: EncoderOptions) -> str:
+        if options.format == "PNG":
+            return "PNG"
+        if options.format == "JPEG":
+            return f"JPEG q={options.quality}"
+        text = f"WEBP m={options.method} " + (
+            "lossless" if options.lossless else f"q={options.quality}"
+        )
+        if options.scale != 1:
+            text += f" x{options.scale}"
+        return text
+
+    async def benchmark(self, *args, **options):
+        await refresh_cache()
+
+        special: Special | None = None
+        if special_name := options.get("special"):
+            special = await Special.get_or_none(name__iexact=special_name)
+            if special is None:
+                raise CommandError(f'No special found with the name "{special_name}"')
+
+        balls = await Ball.all().order_by("id").limit(options["count"])
+        if not balls:
+            raise CommandError(f"You need at least one {settings.collectible_name} created.")
+
+        self.stderr.write(f"Rendering {len(balls)} cards...")
+        images = [
+            draw_card(BallInstance(ball=ball, special=special), "./media/", EncoderOptions())[0]
+            for ball in balls
+        ]
+        current = EncoderOptions.from_settings()
+
+        self.stdout.write(
+            f"{'encoder':<24} {'mean ms':>9} {'p50 ms':>9} {'max ms':>9} {'mean KiB':>9}"
+        )
+        for encoder in OPTIONS if current in OPTIONS else (current, *OPTIONS):
+            times: list[float] = []
+            sizes: list[int] = []
+            for image in images:
+                start = time.perf_counter()
+                resized, kwargs = encoder.prepare(image)
+                buffer = BytesIO()
+                resized.save(buffer, **kwargs)
+                times.append((time.perf_counter() - start) * 1000)
+                sizes.append(buffer.tell())
+            name = self.describe(encoder) + (" *" if encoder == current else "")
+            self.stdout.write(
+                f"{name:<24} {statistics.mean(times):>9.1f} {statistics.median(times):>9.1f} "
+                f"{max(times):>9.1f} {statistics.mean(sizes) / 1024:>9.1f}"
+            )
+        self.stderr.write(self.style.SUCCESS("* current settings"))
+
+    def handle(self, *args, **options):
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(self.benchmark(*args, **options))
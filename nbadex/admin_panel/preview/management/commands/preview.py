@@ -1,21 +1,29 @@
 import asyncio
+import json
 import os
 import sys
+import time
+from pathlib import Path
 
 from django.core.management.base import BaseCommand, CommandError, CommandParser
 from tortoise.exceptions import DoesNotExist
 
-from ballsdex.core.image_generator.image_gen import draw_card
+from ballsdex.core.image_generator.image_gen import CardData, EncoderOptions, draw_card
+from ballsdex.core.image_generator.pool import create_process_pool, render_to_file
 from ballsdex.core.models import Ball, BallInstance, Special
 from ballsdex.settings import settings
 
-from ...utils import refresh_cache
+from ...utils import card_fingerprint, media_mtimes, refresh_cache
+
+MEDIA_PATH = "./media/"
+MANIFEST_FILENAME = ".manifest.json"
 
 
 class Command(BaseCommand):
     help = (
         "Generate a local preview of a card. This will use the system's image viewer "
-        "or print to stdout if the output is being piped."
+        "or print to stdout if the output is being piped. With --output-dir, cards are "
+        "written to a folder instead, which allows rendering every card at once."
     )
 
     def add_arguments(self, parser: CommandParser):
@@ -26,12 +34,114 @@ class Command(BaseCommand):
         )
         parser.add_argument(
             "--special",
-            help="The special event's background you want to use, otherwise regime is used",
+            help="The special event's background you want to use, otherwise regime is used. "
+            'With --output-dir, "all" renders every special in addition to the regime card.',
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help=f"Render every {settings.collectible_name}. Requires --output-dir.",
+        )
+        parser.add_argument(
+            "--output-dir",
+            type=Path,
+            help="Write the cards to this folder. Cards whose inputs did not change since the "
+            "last export are skipped.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help="Number of processes rendering cards with --output-dir. Defaults to the number "
+            "of CPUs.",
         )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Render every card with --output-dir, even if its inputs did not change.",
+        )
+
+    async def export(self, balls: list[Ball], specials: list[Special | None], options: dict):
+        output_dir: Path = options["output_dir"]
+        output_dir.mkdir(parents=True, exist_ok=True)
+        manifest_path = output_dir / MANIFEST_FILENAME
+        manifest: dict[str, str] = {}
+        if manifest_path.exists() and not options["force"]:
+            try:
+                manifest = json.loads(manifest_path.read_text())
+            except ValueError:
+                self.stderr.write(self.style.WARNING("Ignoring invalid manifest."))
+
+        encoder = EncoderOptions.from_settings()
+        tasks: list[tuple[str, str, CardData]] = []
+        skipped = 0
+        for ball in balls:
+            for special in specials:
+                card = CardData.from_instance(BallInstance(ball=ball, special=special))
+                filename = f"ball-{ball.pk}" + (f"-special-{special.pk}" if special else "")
+                filename += f".{encoder.extension}"
+                fingerprint = card_fingerprint(card, encoder, media_mtimes(card, MEDIA_PATH))
+                if manifest.get(filename) == fingerprint and (output_dir / filename).exists():
+                    skipped += 1
+                    continue
+                tasks.append((filename, fingerprint, card))
+
+        self.stderr.write(f"{len(tasks)} cards to render, {skipped} unchanged.")
+        if not tasks:
+            return
+
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        total_size = 0
+        failed = 0
+        with create_process_pool(options.get("workers")) as executor:
+            futures = {
+                loop.run_in_executor(
+                    executor,
+                    render_to_file,
+                    card,
+                    encoder,
+                    MEDIA_PATH,
+                    str(output_dir / filename),
+                ): (filename, fingerprint)
+                for filename, fingerprint, card in tasks
+            }
+            i = 0
+            async for future in asyncio.as_completed(futures):
+                i += 1
+                filename, fingerprint = futures[future]
+                try:
+                    size = future.result()
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(self.style.ERROR(f"[{i}/{len(tasks)}] {filename}: {e!r}"))
+                    continue
+                manifest[filename] = fingerprint
+                total_size += size
+                self.stderr.write(f"[{i}/{len(tasks)}] {filename} ({size / 1024:.0f} KiB)")
+                # saved regularly to keep the progress if interrupted
+                if i % 50 == 0:
+                    manifest_path.write_text(json.dumps(manifest))
+        manifest_path.write_text(json.dumps(manifest))
+
+        elapsed = time.perf_counter() - start
+        rendered = len(tasks) - failed
+        self.stderr.write(
+            self.style.SUCCESS(
+                f"Rendered {rendered} cards in {elapsed:.1f}s ({rendered / elapsed:.1f} cards/s, "
+                f"{total_size / 1024 / 1024:.1f} MiB)"
+            )
+        )
+        if failed:
+            raise CommandError(f"{failed} cards failed to render.")
 
     async def generate_preview(self, *args, **options):
         await refresh_cache()
 
+        if options.get("output_dir"):
+            return await self.generate_export(options)
+        if options.get("all") or (options.get("special") or "").lower() == "all":
+            raise CommandError("--output-dir is required to render multiple cards.")
+
         if ball_name := options.get("ball"):
             try:
                 ball = await Ball.get(country__iexact=ball_name)
@@ -84,6 +194,27 @@ class Command(BaseCommand):
         else:
             image.save(sys.stdout.buffer, **kwargs)
 
+    async def generate_export(self, options: dict):
+        if options.get("all"):
+            balls = await Ball.all().order_by("id")
+        elif ball_name := options.get("ball"):
+            balls = await Ball.filter(country__iexact=ball_name)
+        else:
+            balls = await Ball.all().order_by("id").limit(1)
+        if not balls:
+            raise CommandError(f"No {settings.collectible_name} found.")
+
+        specials: list[Special | None] = [None]
+        if (special_name := options.get("special")) and special_name.lower() == "all":
+            specials.extend(await Special.all().order_by("id"))
+        elif special_name:
+            try:
+                specials = [await Special.get(name__iexact=special_name)]
+            except DoesNotExist as e:
+                raise CommandError(f'No special found with the name "{special_name}"') from e
+
+        await self.export(balls, specials, options)
+
     def handle(self, *args, **options):
         loop = asyncio.get_event_loop()
         loop.run_until_complete(self.generate_preview(*args, **options))
@@ -0,0 +1,21 @@
+from functools import partial
+
+from bd_models.models import Ball, Economy, Regime, Special
+from django.db import transaction
+from django.db.models import Model
+from django.db.models.signals import post_delete, post_save
+
+from .utils import catalog
+
+
+def catalog_changed(sender: type[Model], instance: Model, **kwargs):
+    # after the commit, the preview would otherwise reload the previous row
+    transaction.on_commit(partial(catalog.mark_changed, sender.__name__, instance.pk))
+
+
+def connect_signals():
+    for model in (Ball, Regime, Economy, Special):
+        post_save.connect(catalog_changed, sender=model, dispatch_uid=f"preview-{model.__name__}")
+        post_delete.connect(
+            catalog_changed, sender=model, dispatch_uid=f"preview-delete-{model.__name__}"
+        )
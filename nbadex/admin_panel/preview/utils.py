@@ -1,8 +1,14 @@
+import hashlib
 import os
+import threading
+import time
+from collections import defaultdict
 
 from tortoise import Tortoise
 
 from ballsdex.__main__ import init_tortoise
+from ballsdex.core.image_generator.cache import card_cache_key
+from ballsdex.core.image_generator.image_gen import CardData, EncoderOptions
 from ballsdex.core.models import (
     Ball,
     Economy,
@@ -14,6 +20,94 @@ from ballsdex.core.models import (
     specials,
 )
 
+# models used to render cards, with the dictionary holding them in cache
+CATALOG = {
+    "Ball": (Ball, balls),
+    "Regime": (Regime, regimes),
+    "Economy": (Economy, economies),
+    "Special": (Special, specials),
+}
+
+# rows may be edited outside of the admin panel (bot commands, SQL), reload everything
+# periodically to catch up with those changes
+FULL_RELOAD_INTERVAL = 60
+
+
+class CatalogState:
+    """
+    Tracks the rows of the catalog modified through the admin panel, to only reload those
+    instead of every table on each preview.
+
+    Django signals are sent from the threads running synchronous views, hence the lock.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # incremented on each change, and the value of the last changes applied to the cache
+        self.version = 0
+        self.loaded_version = 0
+        # model name -> primary keys changed since the last reload
+        self.changed: dict[str, set[int]] = defaultdict(set)
+        # (model name, primary key) -> timestamp of the last change
+        self.modified: dict[tuple[str, int], float] = {}
+        self.started = time.time()
+        self.last_full_reload: float | None = None
+
+    def mark_changed(self, model: str, pk: int):
+        with self.lock:
+            self.version += 1
+            self.changed[model].add(pk)
+            self.modified[(model, pk)] = time.time()
+
+    def pop_changes(self) -> dict[str, set[int]]:
+        """
+        Return the rows changed since the last call, and mark them as loaded.
+        """
+        with self.lock:
+            changed, self.changed = self.changed, defaultdict(set)
+            self.loaded_version = self.version
+            return changed
+
+    @property
+    def up_to_date(self) -> bool:
+        return self.loaded_version == self.version
+
+    def last_modified(self, *rows: tuple[str, int | None]) -> float:
+        """
+        Return the timestamp of the latest change among the given rows. Rows that were not
+        modified since the admin panel started are considered modified at startup.
+        """
+        with self.lock:
+            return max(
+                (self.modified.get((model, pk), self.started) for model, pk in rows if pk),
+                default=self.started,
+            )
+
+
+catalog = CatalogState()
+
+
+def media_mtimes(card: CardData, media_path: str) -> list[float]:
+    """
+    Return the modification times of the media files used by the card. Missing files are
+    ignored.
+    """
+    mtimes: list[float] = []
+    for filename in filter(None, (card.background, card.collection_card, card.economy_icon)):
+        try:
+            mtimes.append(os.stat(media_path + filename).st_mtime)
+        except OSError:
+            pass
+    return mtimes
+
+
+def card_fingerprint(card: CardData, options: EncoderOptions, mtimes: list[float]) -> str:
+    """
+    Identify the rendered card from everything it depends on: the content of the card, the
+    encoder options and the modification times of its media files.
+    """
+    return hashlib.sha256(f"{card_cache_key(card, options)}{mtimes}".encode()).hexdigest()
+
 
 async def refresh_cache():
     """
@@ -21,22 +115,33 @@ async def refresh_cache():
     initializing the connection to Tortoise.
 
     This must be called on every request, since the image generation relies on cache and we
-    do *not* want caching in the admin panel to happen (since we're actively editing stuff).
+    do *not* want stale data in the admin panel (since we're actively editing stuff). Only the
+    rows modified since the last call are reloaded, with a full reload every
+    `FULL_RELOAD_INTERVAL` seconds.
     """
     if not Tortoise._inited:
         await init_tortoise(os.environ["BALLSDEXBOT_DB_URL"], skip_migrations=True)
-    balls.clear()
-    for ball in await Ball.all():
-        balls[ball.pk] = ball
-
-    regimes.clear()
-    for regime in await Regime.all():
-        regimes[regime.pk] = regime
 
-    economies.clear()
-    for economy in await Economy.all():
-        economies[economy.pk] = economy
+    if (
+        catalog.last_full_reload is None
+        or time.monotonic() - catalog.last_full_reload > FULL_RELOAD_INTERVAL
+    ):
+        # changes made during the reload are kept for the next call
+        catalog.pop_changes()
+        for model, cache in CATALOG.values():
+            rows = await model.all()
+            cache.clear()
+            for row in rows:
+                cache[row.pk] = row
+        catalog.last_full_reload = time.monotonic()
+        return
 
-    specials.clear()
-    for special in await Special.all():
-        specials[special.pk] = special
+    # nothing was changed since the last call, skip the lock and the queries
+    if catalog.up_to_date:
+        return
+    for name, pks in catalog.pop_changes().items():
+        model, cache = CATALOG[name]
+        for pk in pks:
+            cache.pop(pk, None)
+        for row in await model.filter(pk__in=pks):
+            cache[row.pk] = row
@@ -1,10 +1,46 @@
+import asyncio
+
 from django.contrib import messages
 from django.http import HttpRequest, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 
-from ballsdex.core.image_generator.image_gen import draw_card
+from ballsdex.core.image_generator.image_gen import CardData, EncoderOptions, render_card
 from ballsdex.core.models import Ball, BallInstance, Special
 
-from .utils import refresh_cache
+from .utils import card_fingerprint, catalog, media_mtimes, refresh_cache
+
+MEDIA_PATH = "./media/"
+
+
+async def card_response(
+    request: HttpRequest, instance: BallInstance, rows: list[tuple[str, int | None]]
+) -> HttpResponse:
+    """
+    Render the card of the instance, or reply with 304 Not Modified if the browser already has
+    the same card.
+
+    The ETag identifies the card content and the media files it uses, Last-Modified is the
+    time of the latest change of the given catalog rows or media files.
+    """
+    card = CardData.from_instance(instance)
+    options = EncoderOptions.from_settings()
+    mtimes = media_mtimes(card, MEDIA_PATH)
+    etag = quote_etag(card_fingerprint(card, options, mtimes))
+    last_modified = int(max(catalog.last_modified(*rows), *mtimes))
+
+    response = HttpResponse(content_type=options.content_type)
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    # always revalidate, the catalog is being edited
+    response["Cache-Control"] = "private, no-cache"
+    conditional_response = get_conditional_response(request, etag, last_modified, response)
+    if conditional_response is not response:
+        return conditional_response
+
+    image, kwargs = await asyncio.to_thread(render_card, card, MEDIA_PATH, options)
+    image.save(response, **kwargs)  # type: ignore
+    return response
 
 
 async def render_ballinstance(request: HttpRequest, ball_pk: int) -> HttpResponse:
@@ -12,11 +48,11 @@ async def render_ballinstance(request: HttpRequest, ball_pk: int) -> HttpRespons
 
     ball = await Ball.get(pk=ball_pk)
     instance = BallInstance(ball=ball)
-    image, kwargs = draw_card(instance, media_path="./media/")
-
-    response = HttpResponse(content_type="image/png")
-    image.save(response, **kwargs)  # type: ignore
-    return response
+    return await card_response(
+        request,
+        instance,
+        [("Ball", ball.pk), ("Regime", ball.regime_id), ("Economy", ball.economy_id)],
+    )
 
 
 async def render_special(request: HttpRequest, special_pk: int) -> HttpResponse:
@@ -32,8 +68,13 @@ async def render_special(request: HttpRequest, special_pk: int) -> HttpResponse:
 
     special = await Special.get(pk=special_pk)
     instance = BallInstance(ball=ball, special=special)
-    image, kwargs = draw_card(instance, media_path="./media/")
-
-    response = HttpResponse(content_type="image/png")
-    image.save(response, **kwargs)  # type: ignore
-    return response
+    return await card_response(
+        request,
+        instance,
+        [
+            ("Ball", ball.pk),
+            ("Regime", ball.regime_id),
+            ("Economy", ball.economy_id),
+            ("Special", special.pk),
+        ],
+    )
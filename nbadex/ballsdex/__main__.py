@@ -186,6 +186,11 @@ async def shutdown_handler(bot: BallsDexBot, signal_type: str | None = None):
     try:
         await asyncio.wait_for(bot.close(), timeout=10)
     finally:
+        # process workers would outlive the bot otherwise
+        try:
+            await asyncio.wait_for(bot.render_pool.close(), timeout=10)
+        except Exception:
+            log.exception("Failed to close the render pool")
         pending = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
         [task.cancel() for task in pending]
         try:
@@ -343,6 +348,7 @@ def main():
             command_prefix=when_mentioned_or(prefix),
             dev=cli_flags.dev,  # type: ignore
             shard_count=settings.shard_count,
+            shard_ids=settings.shard_ids,
             disable_message_content=cli_flags.disable_message_content,
             disable_time_check=cli_flags.disable_time_check,
             skip_tree_sync=cli_flags.skip_tree_sync,
@@ -0,0 +1,5 @@
+"""
+Offline benchmarks, runnable without Discord or a database.
+
+Run them with `python -m ballsdex.benchmarks.<name> --help`.
+"""
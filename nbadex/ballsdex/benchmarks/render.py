@@ -0,0 +1,278 @@
+"""
+Benchmark of the card rendering pipeline, using synthetic media and no database.
+
+    python -m ballsdex.benchmarks.render [--iterations 20] [--json]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from dataclasses import asdict
+from io import BytesIO
+from typing import Any, Callable, Iterator
+
+from PIL import Image
+
+from ballsdex.benchmarks.utils import peak_rss, print_results, summarize
+from ballsdex.core.image_generator.image_gen import (
+    HEIGHT,
+    ICON_SIZE,
+    WIDTH,
+    CardData,
+    EncoderOptions,
+    artwork_size,
+    asset_cache,
+    brightness_manifest,
+    layer_cache,
+    render_card,
+    text_cache,
+)
+
+REGIMES = 4
+SPECIALS = 4
+ECONOMIES = 4
+BALLS = 40
+
+DESCRIPTION = "Deals double damage to the opponent when it is raining."
+LONG_DESCRIPTION = (
+    "When this card enters the battle, it summons a storm that lasts three turns and deals "
+    "damage to every opponent.\n"
+    "While the storm lasts, attacks from the opponent have a chance of missing their target.\n"
+    "Once the storm ends, this card recovers half of the health it lost."
+)
+
+
+def make_image(size: tuple[int, int], seed: int) -> Image.Image:
+    """
+    Generate an image with gradients and noise, compressing about as well as real artwork.
+    """
+    red = Image.linear_gradient("L").rotate(seed * 90).resize(size)
+    green = Image.effect_mandelbrot(size, (-2 + seed % 7 / 10, -1.5, 1, 1.5), 64)
+    blue = Image.effect_noise(size, 4 + seed % 8)
+    return Image.merge("RGBA", (red, green, blue, Image.new("L", size, 255)))
+
+
+def save(image: Image.Image, path: str):
+    # the time spent compressing the fixtures is not measured
+    image.save(path, compress_level=1)
+
+
+def generate_media(media_path: str):
+    """
+    Write synthetic backgrounds, artworks and icons with the dimensions of real uploads.
+    """
+    for i in range(REGIMES):
+        save(make_image((WIDTH, HEIGHT), i), f"{media_path}regime-{i}.png")
+    for i in range(SPECIALS):
+        save(make_image((WIDTH, HEIGHT), REGIMES + i), f"{media_path}special-{i}.png")
+    for i in range(ECONOMIES):
+        save(make_image((ICON_SIZE[0] * 2, ICON_SIZE[1] * 2), i), f"{media_path}icon-{i}.png")
+    # uploaded artworks are usually larger than the area they are fitted in
+    artwork = (artwork_size[0] + 200, artwork_size[1] + 100)
+    for i in range(BALLS):
+        save(make_image(artwork, i), f"{media_path}artwork-{i}.png")
+
+
+def make_card(
+    ball_id: int,
+    special_id: int | None = None,
+    description: str = DESCRIPTION,
+    health: int = 1500,
+    attack: int = 800,
+) -> CardData:
+    """
+    Build the card of a synthetic ball, which stands for a ball instance from the database.
+    """
+    ball_id %= BALLS
+    return CardData(
+        ball_id=ball_id,
+        special_id=special_id,
+        title=f"Ball {ball_id}",
+        capacity_name=f"Storm of the ball {ball_id}",
+        capacity_description=f"{description} ({ball_id})",
+        credits=f"Artist {ball_id}",
+        special_credits=f"Special artist {special_id}" if special_id is not None else None,
+        background=(
+            f"special-{special_id % SPECIALS}.png"
+            if special_id is not None
+            else f"regime-{ball_id % REGIMES}.png"
+        ),
+        collection_card=f"artwork-{ball_id}.png",
+        economy_icon=f"icon-{ball_id % ECONOMIES}.png",
+        health=health,
+        attack=attack,
+        rarity=None,
+    )
+
+
+def load_assets(media_path: str):
+    """
+    Decode every synthetic asset ahead of time.
+    """
+    for i in range(REGIMES):
+        asset_cache.load(f"{media_path}regime-{i}.png")
+    for i in range(SPECIALS):
+        asset_cache.load(f"{media_path}special-{i}.png")
+    for i in range(ECONOMIES):
+        asset_cache.load(f"{media_path}icon-{i}.png", ICON_SIZE)
+    for i in range(BALLS):
+        asset_cache.load(f"{media_path}artwork-{i}.png", tuple(artwork_size))
+
+
+def clear_caches(media_path: str):
+    asset_cache.clear()
+    layer_cache.clear()
+    text_cache.clear()
+    brightness_manifest.manifests.clear()
+    try:
+        os.unlink(media_path + brightness_manifest.FILENAME)
+    except FileNotFoundError:
+        pass
+
+
+def cold(media_path: str) -> Iterator[list[CardData]]:
+    """
+    Nothing is cached, as for the first card rendered after a restart.
+    """
+    i = 0
+    while True:
+        clear_caches(media_path)
+        yield [make_card(i)]
+        i += 1
+
+
+def warm(media_path: str) -> Iterator[list[CardData]]:
+    """
+    Instances of a ball that was already rendered, only the stats differ.
+    """
+    render_card(make_card(0), media_path)
+    i = 0
+    while True:
+        yield [make_card(0, health=1500 + i % 50, attack=800 - i % 50)]
+        i += 1
+
+
+def special(media_path: str) -> Iterator[list[CardData]]:
+    """
+    First render of balls with a special background, with the assets already decoded.
+    """
+    i = 0
+    while True:
+        layer_cache.clear()
+        yield [make_card(i, special_id=i % SPECIALS)]
+        i += 1
+
+
+def long_ability(media_path: str) -> Iterator[list[CardData]]:
+    """
+    First render of balls with a long ability description, with the assets already decoded.
+    """
+    i = 0
+    while True:
+        layer_cache.clear()
+        yield [make_card(i, description=LONG_DESCRIPTION)]
+        i += 1
+
+
+def batch(media_path: str, size: int) -> Iterator[list[CardData]]:
+    """
+    Multiple balls rendered together, as in a pack opening.
+    """
+    i = 0
+    while True:
+        yield [make_card(i * size + j, health=1500 + j, attack=800 + j) for j in range(size)]
+        i += 1
+
+
+def run_scenario(
+    name: str,
+    scenario: Iterator[list[CardData]],
+    media_path: str,
+    options: EncoderOptions,
+    iterations: int,
+) -> dict[str, Any]:
+    render_times: list[float] = []
+    encode_times: list[float] = []
+    sizes: list[int] = []
+    for _ in range(iterations):
+        cards = next(scenario)
+        render_time = encode_time = 0.0
+        size = 0
+        for card in cards:
+            start = time.perf_counter()
+            image, kwargs = render_card(card, media_path, options)
+            rendered = time.perf_counter()
+            buffer = BytesIO()
+            image.save(buffer, **kwargs)
+            encoded = time.perf_counter()
+            render_time += rendered - start
+            encode_time += encoded - rendered
+            size += buffer.tell()
+        render_times.append(render_time * 1000)
+        encode_times.append(encode_time * 1000)
+        sizes.append(size)
+    return {
+        "name": name,
+        "iterations": iterations,
+        "cards": len(cards),
+        "render_ms": summarize(render_times),
+        "encode_ms": summarize(encode_times),
+        "size_kib": sum(sizes) / len(sizes) / 1024,
+        "peak_rss_mib": (peak_rss() or 0) / 1024 / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m ballsdex.benchmarks.render",
+        description="Benchmark card rendering with synthetic media",
+    )
+    parser.add_argument("--iterations", type=int, default=20, help="Samples per scenario")
+    parser.add_argument("--batch-size", type=int, default=10, help="Cards per batch render")
+    parser.add_argument("--format", default="WEBP", choices=("WEBP", "PNG", "JPEG"))
+    parser.add_argument("--quality", type=int, default=80)
+    parser.add_argument("--method", type=int, default=4, help="WEBP encoding effort")
+    parser.add_argument("--lossless", action="store_true")
+    parser.add_argument("--json", action="store_true", help="Output the results as JSON")
+    args = parser.parse_args()
+
+    options = EncoderOptions(args.format, args.quality, args.method, args.lossless)
+    scenarios: dict[str, Callable[[str], Iterator[list[CardData]]]] = {
+        "cold": cold,
+        "warm": warm,
+        "special": special,
+        "long-ability": long_ability,
+        "batch": lambda x: batch(x, args.batch_size),
+    }
+
+    with tempfile.TemporaryDirectory(prefix="ballsdex-benchmark-") as directory:
+        media_path = directory + os.sep
+        generate_media(media_path)
+        results: list[dict[str, Any]] = []
+        for name, scenario in scenarios.items():
+            # the cold scenario clears everything, others start with decoded assets
+            load_assets(media_path)
+            results.append(
+                run_scenario(name, scenario(media_path), media_path, options, args.iterations)
+            )
+
+    print_results(
+        "render",
+        results,
+        {
+            "cards": "cards",
+            "render_ms.p50": "render p50 ms",
+            "render_ms.p99": "render p99 ms",
+            "encode_ms.p50": "encode p50 ms",
+            "encode_ms.p99": "encode p99 ms",
+            "size_kib": "size KiB",
+            "peak_rss_mib": "peak RSS MiB",
+        },
+        as_json=args.json,
+        parameters={**vars(args), "encoder": asdict(options)},
+    )
+
+
+if __name__ == "__main__":
+    main()
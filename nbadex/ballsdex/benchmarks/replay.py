@@ -0,0 +1,313 @@
+"""
+Offline replay of message streams through spawn managers, with a virtual clock.
+
+    python -m ballsdex.benchmarks.replay [--guilds 500] [--hours 24] [--json]
+    python -m ballsdex.benchmarks.replay --input messages.csv --config config.yml
+    python -m ballsdex.benchmarks.replay --managers \\
+        ballsdex.packages.countryballs.spawn.SpawnManager yourpackage.SpawnManager
+
+Messages are either read from a CSV file with the columns `timestamp` (Unix time in seconds),
+`guild_id`, `author_id`, `content_length` and `member_count`, sorted by timestamp, or
+generated for synthetic guilds of various sizes and activities.
+
+Each manager receives fake messages in order. Managers exposing a `clock` attribute (like the
+default one) are given the time of the stream instead of the real monotonic clock, so hours of
+messages are replayed in seconds. Managers must not sleep.
+
+The spawns per guild-hour, the time taken by each decision and the memory held per guild once
+the stream is replayed are reported for each manager, to tune `spawn-chance-range` and check the
+throughput of new managers before deploying them.
+"""
+
+import argparse
+import asyncio
+import csv
+import gc
+import heapq
+import importlib
+import math
+import random
+import sys
+import time
+import types
+from array import array
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator
+
+from ballsdex.benchmarks.spawn import FakeAuthor, FakeGuild, FakeMessage
+from ballsdex.benchmarks.utils import print_results, summarize
+from ballsdex.packages.countryballs.spawn import BaseSpawnManager
+from ballsdex.settings import read_settings, settings
+
+# member counts of the synthetic guilds, with their share of the guilds
+GUILD_SIZES = ((3, 0.1), (20, 0.3), (80, 0.3), (400, 0.2), (3000, 0.08), (30000, 0.02))
+# Discord epoch, for generating snowflakes
+DISCORD_EPOCH = 1420070400000
+
+
+@dataclass(slots=True)
+class Event:
+    timestamp: float
+    guild_id: int
+    author_id: int
+    content_length: int
+    member_count: int
+
+
+@dataclass(slots=True)
+class SyntheticGuild:
+    id: int
+    member_count: int
+    # mean number of messages per hour
+    rate: float
+    authors: list[int]
+    author_weights: list[float]
+
+
+def snowflake(rng: random.Random, timestamp: float) -> int:
+    # random milliseconds, the low bits of the timestamp are used to split guilds
+    milliseconds = int(timestamp) * 1000 + rng.randrange(1000)
+    return (milliseconds - DISCORD_EPOCH) << 22 | rng.getrandbits(22)
+
+
+def make_guilds(count: int, start: float, seed: int = 0) -> list[SyntheticGuild]:
+    rng = random.Random(seed)
+    sizes, weights = zip(*GUILD_SIZES)
+    guilds: list[SyntheticGuild] = []
+    for _ in range(count):
+        member_count = rng.choices(sizes, weights)[0]
+        # most guilds are quiet, a few are very active
+        rate = min(rng.lognormvariate(math.log(member_count) / 2 + 1, 1), 3600)
+        chatters = max(1, min(member_count, int(rng.paretovariate(1) * 3)))
+        authors = [snowflake(rng, start - rng.randrange(10**8)) for _ in range(chatters)]
+        # a few chatters send most of the messages
+        author_weights = [1 / (i + 1) for i in range(chatters)]
+        guilds.append(
+            SyntheticGuild(
+                snowflake(rng, start - rng.randrange(10**8)),
+                member_count,
+                rate,
+                authors,
+                author_weights,
+            )
+        )
+    return guilds
+
+
+def generate_events(
+    guilds: list[SyntheticGuild], start: float, hours: float, seed: int = 0
+) -> Iterator[Event]:
+    """
+    Generate the messages of the guilds in order, each guild sending messages at random
+    intervals around its rate.
+    """
+    rng = random.Random(seed)
+    end = start + hours * 3600
+    queue = [(start + rng.expovariate(x.rate / 3600), i) for i, x in enumerate(guilds)]
+    heapq.heapify(queue)
+    while queue:
+        timestamp, i = queue[0]
+        if timestamp >= end:
+            break
+        guild = guilds[i]
+        heapq.heapreplace(queue, (timestamp + rng.expovariate(guild.rate / 3600), i))
+        yield Event(
+            timestamp,
+            guild.id,
+            rng.choices(guild.authors, guild.author_weights)[0],
+            # a fifth of the messages are shorter than 5 characters
+            rng.randrange(1, 5) if rng.random() < 0.2 else int(rng.lognormvariate(3.3, 0.8)),
+            guild.member_count,
+        )
+
+
+def read_events(path: Path) -> Iterator[Event]:
+    with path.open(newline="") as file:
+        for row in csv.DictReader(file):
+            yield Event(
+                float(row["timestamp"]),
+                int(row["guild_id"]),
+                int(row["author_id"]),
+                int(row["content_length"]),
+                int(row["member_count"]),
+            )
+
+
+def deep_size(obj: Any, exclude: set[int]) -> int:
+    """
+    Return the size in bytes of the objects reachable from `obj`, excluding classes, modules,
+    functions and the objects in `exclude`.
+    """
+    seen = set(exclude)
+    pending = [obj]
+    size = 0
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen or isinstance(
+            obj, (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType)
+        ):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        pending.extend(gc.get_referents(obj))
+    return size
+
+
+def set_clock(manager: BaseSpawnManager, clock: Any, seen: set[int] | None = None):
+    """
+    Replace the clock of a manager and of the managers it wraps, like `ExperimentSpawner` does.
+    """
+    seen = seen if seen is not None else set()
+    if id(manager) in seen:
+        return
+    seen.add(id(manager))
+    if hasattr(manager, "clock"):
+        manager.clock = clock  # type: ignore
+    for value in vars(manager).values():
+        for item in value.values() if isinstance(value, dict) else (value,):
+            if isinstance(item, BaseSpawnManager):
+                set_clock(item, clock, seen)
+
+
+def size_bucket(member_count: int) -> str:
+    return f"<={10 ** math.ceil(math.log(max(member_count - 1, 1), 10))}"
+
+
+async def replay(path: str, events: Iterator[Event], seed: int) -> dict[str, Any]:
+    module_path, class_name = path.rsplit(".", 1)
+    manager_class: type[BaseSpawnManager] = getattr(
+        importlib.import_module(module_path), class_name
+    )
+    # spawn managers draw their thresholds with the random module
+    random.seed(seed)
+    manager = manager_class(None)  # type: ignore
+    now = 0.0
+
+    def clock() -> float:
+        return now
+
+    set_clock(manager, clock)
+
+    guilds: dict[int, FakeGuild] = {}
+    authors: dict[int, FakeAuthor] = {}
+    contents: dict[int, str] = {}
+    latencies = array("d")
+    spawns: Counter[int] = Counter()
+    algorithms: Counter[str] = Counter()
+    first: float | None = None
+    for event in events:
+        if first is None:
+            first = event.timestamp
+        now = event.timestamp - first
+        guild = guilds.get(event.guild_id)
+        if guild is None:
+            guild = guilds[event.guild_id] = FakeGuild(event.guild_id, event.member_count)
+        else:
+            guild.member_count = event.member_count
+        author = authors.get(event.author_id)
+        if author is None:
+            author = authors[event.author_id] = FakeAuthor(event.author_id)
+        content = contents.get(event.content_length)
+        if content is None:
+            content = contents[event.content_length] = "a" * event.content_length
+        message = FakeMessage(
+            guild, author, content, datetime.fromtimestamp(event.timestamp, timezone.utc)
+        )
+
+        t0 = time.perf_counter_ns()
+        result = await manager.handle_message(message)  # type: ignore
+        latencies.append((time.perf_counter_ns() - t0) / 1000)
+
+        if result is not False:
+            spawns[guild.id] += 1
+            algorithms[result[1] if isinstance(result, tuple) else path] += 1
+
+    hours = max(now, 1) / 3600
+    guild_hours: dict[str, float] = defaultdict(float)
+    bucket_spawns: Counter[str] = Counter()
+    for guild in guilds.values():
+        bucket = size_bucket(guild.member_count)
+        guild_hours[bucket] += hours
+        bucket_spawns[bucket] += spawns[guild.id]
+    exclude = {id(x) for x in (*guilds.values(), *authors.values(), *contents.values())}
+    memory = deep_size(manager, exclude)
+    return {
+        "name": class_name,
+        "manager": path,
+        "messages": len(latencies),
+        "guilds": len(guilds),
+        "hours": hours,
+        "spawns": sum(spawns.values()),
+        "spawns_per_guild_hour": sum(spawns.values()) / max(len(guilds) * hours, 1e-9),
+        "spawns_per_guild_hour_by_size": {
+            x: bucket_spawns[x] / guild_hours[x]
+            for x in sorted(guild_hours, key=lambda x: int(x[2:]))
+        },
+        "algorithms": dict(algorithms),
+        "decision_us": summarize(latencies) if latencies else None,
+        "decisions_per_second": len(latencies) / (sum(latencies) / 1_000_000 or 1),
+        "bytes_per_guild": memory / max(len(guilds), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m ballsdex.benchmarks.replay",
+        description="Replay message streams through spawn managers with a virtual clock",
+    )
+    parser.add_argument(
+        "--managers",
+        nargs="+",
+        help="Python paths of the spawn managers to compare, the configured one by default",
+    )
+    parser.add_argument("--input", type=Path, help="CSV file of recorded messages")
+    parser.add_argument("--config", type=Path, help="Configuration file to read settings from")
+    parser.add_argument(
+        "--spawn-chance-range", type=int, nargs=2, help="Override the configured range"
+    )
+    parser.add_argument("--guilds", type=int, default=500, help="Number of synthetic guilds")
+    parser.add_argument("--hours", type=float, default=24, help="Duration of the synthetic stream")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Output the results as JSON")
+    args = parser.parse_args()
+
+    if args.config:
+        read_settings(args.config)
+    if args.spawn_chance_range:
+        settings.spawn_chance_range = tuple(args.spawn_chance_range)
+
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc).timestamp()
+    synthetic_guilds = None if args.input else make_guilds(args.guilds, start, args.seed)
+    results: list[dict[str, Any]] = []
+    for path in args.managers or [settings.spawn_manager]:
+        if synthetic_guilds is None:
+            events = read_events(args.input)
+        else:
+            events = generate_events(synthetic_guilds, start, args.hours, args.seed)
+        results.append(asyncio.run(replay(path, events, args.seed)))
+
+    print_results(
+        "replay",
+        results,
+        {
+            "messages": "messages",
+            "guilds": "guilds",
+            "spawns_per_guild_hour": "spawns/guild-hour",
+            "decision_us.p50": "decision p50 us",
+            "decision_us.p99": "decision p99 us",
+            "decisions_per_second": "decisions/s",
+            "bytes_per_guild": "bytes/guild",
+        },
+        as_json=args.json,
+        parameters={
+            **{k: str(v) if isinstance(v, Path) else v for k, v in vars(args).items()},
+            "spawn_chance_range": settings.spawn_chance_range,
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
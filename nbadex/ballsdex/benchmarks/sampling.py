@@ -0,0 +1,129 @@
+"""
+Benchmark of the weighted random selection of spawned balls, with synthetic catalogs.
+
+    python -m ballsdex.benchmarks.sampling [--sizes 1000 10000] [--json]
+
+"choices" is the previous implementation, filtering the catalog and passing the weights to
+`random.choices` on each spawn. "alias" draws from a prebuilt `AliasSampler`.
+"""
+
+import argparse
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from ballsdex.benchmarks.utils import print_results, summarize
+from ballsdex.core.utils.sampling import AliasSampler
+
+
+@dataclass(slots=True)
+class FakeBall:
+    pk: int
+    rarity: float
+    enabled: bool
+
+
+def make_catalog(size: int, seed: int = 0) -> dict[int, FakeBall]:
+    """
+    Build a catalog with a long tail of rare balls and a few disabled ones, like real catalogs.
+    """
+    rng = random.Random(seed)
+    return {
+        i: FakeBall(i, rng.paretovariate(1.5), enabled=rng.random() > 0.05) for i in range(size)
+    }
+
+
+def choices(catalog: dict[int, FakeBall]) -> Callable[[], FakeBall]:
+    def draw() -> FakeBall:
+        population = [x for x in catalog.values() if x.enabled]
+        return random.choices(population, weights=[x.rarity for x in population], k=1)[0]
+
+    return draw
+
+
+def alias(catalog: dict[int, FakeBall]) -> Callable[[], FakeBall]:
+    sampler = AliasSampler((x, x.rarity) for x in catalog.values() if x.enabled)
+    return sampler.sample
+
+
+def total_variation(catalog: dict[int, FakeBall], draws: Counter[int]) -> float:
+    """
+    Distance between the observed and expected distributions, from 0 (identical) to 1.
+    """
+    total_weight = sum(x.rarity for x in catalog.values() if x.enabled)
+    total_draws = sum(draws.values())
+    return (
+        sum(
+            abs(draws[x.pk] / total_draws - (x.rarity / total_weight if x.enabled else 0))
+            for x in catalog.values()
+        )
+        / 2
+    )
+
+
+def run_scenario(
+    name: str,
+    factory: Callable[[dict[int, FakeBall]], Callable[[], FakeBall]],
+    size: int,
+    iterations: int,
+    batch: int,
+) -> dict[str, Any]:
+    catalog = make_catalog(size)
+    start = time.perf_counter()
+    draw = factory(catalog)
+    build_time = time.perf_counter() - start
+
+    times: list[float] = []
+    draws: Counter[int] = Counter()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        results = [draw() for _ in range(batch)]
+        times.append((time.perf_counter() - start) / batch * 1_000_000)
+        draws.update(x.pk for x in results)
+    draw_us = summarize(times)
+    return {
+        "name": f"{name}-{size}",
+        "catalog_size": size,
+        "build_ms": build_time * 1000,
+        "draw_us": draw_us,
+        "draws_per_second": 1_000_000 / draw_us["mean"],
+        "total_variation": total_variation(catalog, draws),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m ballsdex.benchmarks.sampling",
+        description="Benchmark weighted ball sampling with synthetic catalogs",
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--iterations", type=int, default=20, help="Samples per scenario")
+    parser.add_argument("--batch", type=int, default=200, help="Draws per sample")
+    parser.add_argument("--json", action="store_true", help="Output the results as JSON")
+    args = parser.parse_args()
+
+    scenarios = {"choices": choices, "alias": alias}
+    results = [
+        run_scenario(name, factory, size, args.iterations, args.batch)
+        for size in args.sizes
+        for name, factory in scenarios.items()
+    ]
+    print_results(
+        "sampling",
+        results,
+        {
+            "build_ms": "build ms",
+            "draw_us.p50": "draw p50 us",
+            "draw_us.p99": "draw p99 us",
+            "draws_per_second": "draws/s",
+            "total_variation": "TV distance",
+        },
+        as_json=args.json,
+        parameters=vars(args),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Microbenchmark of the default spawn manager on the message path, with synthetic guilds.
+
+    python -m ballsdex.benchmarks.spawn [--guilds 10000] [--rounds 5] [--json]
+
+Each round sends one message in every guild, each message handled in its own task like
+discord.py does for events. "legacy" is the previous cooldown, which held a lock and slept ten
+seconds for each counted message, and "timestamps" the current one. The time measured for the
+legacy cooldown excludes the end of the parked tasks, which resume ten seconds later.
+
+The memory held by the cooldown of a guild with a full cache of 100 messages is also measured,
+the legacy cooldown kept the content of the messages and the current one only their length.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import tracemalloc
+from collections import deque, namedtuple
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Any
+
+from ballsdex.benchmarks.utils import print_results, summarize
+from ballsdex.packages.countryballs.spawn import SpawnCooldown, SpawnManager
+from ballsdex.settings import settings
+
+CachedMessage = namedtuple("CachedMessage", ["content", "author_id"])
+STATE = SimpleNamespace(intents=SimpleNamespace(message_content=True))
+CONTENTS = ("hello", "lol", "how is everyone doing today?", "gg", "what's the next event?")
+
+
+@dataclass(slots=True)
+class FakeGuild:
+    id: int
+    member_count: int
+
+
+@dataclass(slots=True)
+class FakeAuthor:
+    id: int
+
+
+@dataclass(slots=True)
+class FakeMessage:
+    guild: FakeGuild
+    author: FakeAuthor
+    content: str
+    created_at: datetime
+    _state: Any = field(default_factory=lambda: STATE)
+
+
+@dataclass
+class LegacySpawnCooldown(SpawnCooldown):
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, init=False)
+    message_cache: deque[CachedMessage] = field(  # type: ignore
+        default_factory=lambda: deque(maxlen=100)
+    )
+
+    async def increase_legacy(self, message: FakeMessage) -> bool:
+        self.message_cache.append(
+            CachedMessage(content=message.content, author_id=message.author.id)
+        )
+        if self.lock.locked():
+            return False
+        async with self.lock:
+            message_multiplier = 1
+            if message.guild.member_count < 5 or message.guild.member_count > 1000:
+                message_multiplier /= 2
+            if message._state.intents.message_content and len(message.content) < 5:
+                message_multiplier /= 2
+            if len(set(x.author_id for x in self.message_cache)) < 4 or (
+                len(list(filter(lambda x: x.author_id == message.author.id, self.message_cache)))
+                / self.message_cache.maxlen  # type: ignore
+                > 0.4
+            ):
+                message_multiplier /= 2
+            self.scaled_message_count += message_multiplier
+            await asyncio.sleep(10)
+        return True
+
+
+class LegacySpawnManager(SpawnManager):
+    """
+    The spawn manager before the cooldown used timestamps.
+    """
+
+    async def handle_message(self, message: FakeMessage) -> bool:  # type: ignore
+        cooldown = self.cooldowns.get(message.guild.id)
+        if not cooldown:
+            cooldown = LegacySpawnCooldown(message.created_at)
+            self.cooldowns.set(message.guild.id, cooldown, 0)
+        delta_t = (message.created_at - cooldown.time).total_seconds()
+        if not await cooldown.increase_legacy(message):  # type: ignore
+            return False
+        if cooldown.scaled_message_count + 0.8 * (delta_t // 60) <= cooldown.threshold:
+            return False
+        if delta_t < 600:
+            return False
+        cooldown.reset(message.created_at)
+        return True
+
+
+def make_guilds(count: int, seed: int = 0) -> list[FakeGuild]:
+    rng = random.Random(seed)
+    return [FakeGuild(i, rng.choice((3, 40, 250, 5000))) for i in range(count)]
+
+
+def cache_memory(legacy: bool, guilds: int = 1000) -> float:
+    """
+    Measure the memory held per guild by cooldowns with a full message cache.
+    """
+    rng = random.Random(2)
+    now = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    cooldowns: list[SpawnCooldown] = []
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for _ in range(guilds):
+        cooldown = LegacySpawnCooldown(now) if legacy else SpawnCooldown(now)
+        authors = [rng.randrange(10**17, 10**18) for _ in range(20)]
+        for _ in range(100):
+            # new strings, the cache is the only reference left to messages once handled
+            content = "".join(rng.choices("abcdefgh ", k=rng.randrange(1, 60)))
+            author_id = rng.choice(authors)
+            if legacy:
+                cooldown.message_cache.append(CachedMessage(content, author_id))  # type: ignore
+            else:
+                cooldown.message_cache.push(author_id, len(content))
+        cooldowns.append(cooldown)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / guilds
+
+
+async def run_scenario(
+    name: str, manager: SpawnManager, guilds: list[FakeGuild], rounds: int
+) -> dict[str, Any]:
+    rng = random.Random(1)
+    start_time = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    round_times: list[float] = []
+    parked: list[int] = []
+    spawns = 0
+    for i in range(rounds):
+        created_at = start_time + timedelta(seconds=i * 5)
+        messages = [
+            FakeMessage(guild, FakeAuthor(rng.randrange(20)), rng.choice(CONTENTS), created_at)
+            for guild in guilds
+        ]
+        start = time.perf_counter()
+        tasks = [asyncio.create_task(manager.handle_message(x)) for x in messages]  # type: ignore
+        # let every task run until it completes or parks
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        round_times.append((time.perf_counter() - start) / len(messages) * 1_000_000)
+        spawns += sum(1 for x in tasks if x.done() and x.result() is True)
+        parked.append(sum(1 for x in tasks if not x.done()))
+    pending = [x for x in asyncio.all_tasks() if x is not asyncio.current_task()]
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    return {
+        "name": name,
+        "guilds": len(guilds),
+        "message_us": summarize(round_times),
+        "parked_tasks": max(parked),
+        "spawns": spawns,
+    }
+
+
+async def run(args: argparse.Namespace) -> list[dict[str, Any]]:
+    guilds = make_guilds(args.guilds)
+    results: list[dict[str, Any]] = []
+    for name, cls in (("legacy", LegacySpawnManager), ("timestamps", SpawnManager)):
+        manager = cls(None)  # type: ignore
+        result = await run_scenario(name, manager, guilds, args.rounds)
+        result["cache_bytes"] = cache_memory(cls is LegacySpawnManager)
+        results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m ballsdex.benchmarks.spawn",
+        description="Benchmark the spawn manager with synthetic guilds",
+    )
+    parser.add_argument("--guilds", type=int, default=10000, help="Number of active guilds")
+    parser.add_argument("--rounds", type=int, default=5, help="Messages sent in each guild")
+    parser.add_argument("--json", action="store_true", help="Output the results as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print_results(
+        "spawn",
+        results,
+        {
+            "guilds": "guilds",
+            "message_us.p50": "message p50 us",
+            "message_us.max": "message max us",
+            "parked_tasks": "parked tasks",
+            "cache_bytes": "cache bytes/guild",
+        },
+        as_json=args.json,
+        parameters={**vars(args), "spawn_chance_range": settings.spawn_chance_range},
+    )
+
+
+if __name__ == "__main__":
+    main()
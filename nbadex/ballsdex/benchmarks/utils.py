@@ -0,0 +1,98 @@
+import json
+import statistics
+import sys
+from typing import Any, Sequence
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def percentile(values: Sequence[float], percent: int) -> float:
+    """
+    Return the given percentile of the values, interpolated between the closest samples.
+    """
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[percent - 1]
+
+
+def summarize(values: Sequence[float]) -> dict[str, float]:
+    """
+    Return the mean, median, 99th percentile and maximum of the values.
+    """
+    return {
+        "mean": statistics.fmean(values),
+        "p50": percentile(values, 50),
+        "p99": percentile(values, 99),
+        "max": max(values),
+    }
+
+
+def peak_rss() -> int | None:
+    """
+    Return the peak resident memory of this process in bytes, or `None` if unsupported.
+    """
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return usage if sys.platform == "darwin" else usage * 1024
+
+
+def print_results(
+    name: str,
+    results: list[dict[str, Any]],
+    columns: dict[str, str],
+    as_json: bool = False,
+    parameters: dict[str, Any] | None = None,
+):
+    """
+    Print the results of a benchmark, either as a table or as JSON.
+
+    Parameters
+    ----------
+    name: str
+        Name of the benchmark.
+    results: list[dict[str, Any]]
+        One dictionary per scenario, with a "name" key. Values may be nested dictionaries, use
+        dots in `columns` to access them.
+    columns: dict[str, str]
+        Path of the values to display in the table mapped to their header.
+    as_json: bool
+        Print the full results as JSON instead, for comparing runs.
+    parameters: dict[str, Any] | None
+        Parameters of the run, included in the JSON output.
+    """
+    if as_json:
+        json.dump(
+            {
+                "benchmark": name,
+                "parameters": parameters or {},
+                "peak_rss": peak_rss(),
+                "results": results,
+            },
+            sys.stdout,
+        )
+        sys.stdout.write("\n")
+        return
+
+    def get(result: dict[str, Any], path: str) -> str:
+        value: Any = result
+        for key in path.split("."):
+            value = value[key]
+        return f"{value:.2f}" if isinstance(value, float) else str(value)
+
+    rows = [["scenario", *columns.values()]]
+    rows.extend([result["name"], *(get(result, x) for x in columns)] for result in results)
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    for row in rows:
+        print(
+            "  ".join(
+                x.ljust(width) if i == 0 else x.rjust(width)
+                for i, (x, width) in enumerate(zip(row, widths))
+            )
+        )
+    if (rss := peak_rss()) is not None:
+        print(f"\nPeak RSS: {rss / 1024 / 1024:.1f} MiB")
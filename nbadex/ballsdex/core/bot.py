@@ -7,6 +7,7 @@ import math
 import time
 import types
 from datetime import datetime
+from pathlib import Path
 from typing import TYPE_CHECKING, Self, cast
 
 import aiohttp
@@ -27,8 +28,12 @@ from rich import box, print
 from rich.console import Console
 from rich.table import Table
 
+from ballsdex.core.catalog import CatalogListener
 from ballsdex.core.commands import Core
 from ballsdex.core.dev import Dev
+from ballsdex.core.image_generator.cache import RenderCache
+from ballsdex.core.image_generator.pool import RenderPool
+from ballsdex.core.image_generator.wild_cards import WildCardCache
 from ballsdex.core.metrics import PrometheusServer
 from ballsdex.core.models import (
     Ball,
@@ -42,6 +47,9 @@ from ballsdex.core.models import (
     regimes,
     specials,
 )
+from ballsdex.core.utils.catch_names import catch_name_index
+from ballsdex.core.utils.sampling import AliasSampler
+from ballsdex.core.utils.specials import SpecialSchedule
 from ballsdex.settings import settings
 
 if TYPE_CHECKING:
@@ -186,6 +194,25 @@ class BallsDexBot(commands.AutoShardedBot):
         self.catch_log: set[int] = set()
         self.command_log: set[int] = set()
         self.locked_balls = TTLCache(maxsize=99999, ttl=60 * 30)
+        self.render_cache = RenderCache(
+            settings.card_cache_memory_size * 1024 * 1024,
+            Path(settings.card_cache_disk_path) if settings.card_cache_disk_path else None,
+            settings.card_cache_disk_size * 1024 * 1024,
+        )
+        self.render_pool = RenderPool(
+            self.render_cache,
+            "process" if settings.render_pool_mode == "process" else "thread",
+            settings.render_pool_workers,
+            settings.render_queue_size,
+        )
+        self.wild_card_cache = WildCardCache(
+            "./admin_panel/media/", settings.wild_card_cache_size * 1024 * 1024
+        )
+        self.catalog_listener = CatalogListener(self)
+        # enabled balls weighted by rarity, used for spawns and claims
+        self.ball_sampler: AliasSampler[Ball] = AliasSampler([])
+        # active special events, used for catches
+        self.special_schedule = SpecialSchedule()
 
         self.owner_ids: set[int]
 
@@ -222,6 +249,43 @@ class BallsDexBot(commands.AutoShardedBot):
     def get_emoji(self, id: int) -> discord.Emoji | None:
         return self.application_emojis.get(id) or super().get_emoji(id)
 
+    async def load_catalog(self):
+        """
+        Reload the balls, regimes, economies and specials, and the caches depending on them.
+        """
+        new_balls = {ball.pk: ball for ball in await Ball.all()}
+        new_regimes = {regime.pk: regime for regime in await Regime.all()}
+        new_economies = {economy.pk: economy for economy in await Economy.all()}
+        new_specials = {special.pk: special for special in await Special.all()}
+
+        # replaced at once, without awaiting, to never expose a partially loaded catalog
+        balls.clear()
+        balls.update(new_balls)
+        regimes.clear()
+        regimes.update(new_regimes)
+        economies.clear()
+        economies.update(new_economies)
+        specials.clear()
+        specials.update(new_specials)
+
+        self.build_ball_indexes()
+        self.special_schedule.build(specials.values())
+
+        # rendered cards depend on the models above
+        self.render_cache.clear()
+        await self.render_pool.preload(
+            balls.values(), regimes.values(), economies.values(), specials.values()
+        )
+        await asyncio.to_thread(self.wild_card_cache.load, list(balls.values()))
+
+    def build_ball_indexes(self):
+        """
+        Rebuild `ball_sampler` and the catch name index from the cached balls. Call this after
+        modifying `balls`.
+        """
+        self.ball_sampler = AliasSampler((x, x.rarity) for x in balls.values() if x.enabled)
+        catch_name_index.build(balls.values())
+
     async def load_cache(self):
         table = Table(box=box.SIMPLE)
         table.add_column("Model", style="cyan")
@@ -231,24 +295,10 @@ class BallsDexBot(commands.AutoShardedBot):
         for emoji in await self.fetch_application_emojis():
             self.application_emojis[emoji.id] = emoji
 
-        balls.clear()
-        for ball in await Ball.all():
-            balls[ball.pk] = ball
+        await self.load_catalog()
         table.add_row(settings.collectible_name.title() + "s", str(len(balls)))
-
-        regimes.clear()
-        for regime in await Regime.all():
-            regimes[regime.pk] = regime
         table.add_row("Regimes", str(len(regimes)))
-
-        economies.clear()
-        for economy in await Economy.all():
-            economies[economy.pk] = economy
         table.add_row("Economies", str(len(economies)))
-
-        specials.clear()
-        for special in await Special.all():
-            specials[special.pk] = special
         table.add_row("Special events", str(len(specials)))
 
         self.blacklist = set()
@@ -297,6 +347,10 @@ class BallsDexBot(commands.AutoShardedBot):
             log.warning("Gateway proxy is not ready yet, waiting 30 more seconds...")
             await asyncio.sleep(30)
 
+    async def close(self) -> None:
+        self.catalog_listener.stop()
+        await super().close()
+
     async def on_ready(self):
         if self.cogs != {}:
             return  # bot is reconnecting, no need to setup again
@@ -326,6 +380,8 @@ class BallsDexBot(commands.AutoShardedBot):
             )
 
         await self.load_cache()
+        if settings.catalog_listen:
+            self.catalog_listener.start()
         grammar = "" if len(self.blacklist) == 1 else "s"
         if self.blacklist:
             log.info(f"{len(self.blacklist)} blacklisted user{grammar}.")
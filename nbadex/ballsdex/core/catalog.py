@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from typing import TYPE_CHECKING, cast
+
+from tortoise import Tortoise, models
+
+from ballsdex.core.metrics import catalog_invalidation_lag, catalog_resyncs
+from ballsdex.core.models import (
+    Ball,
+    Economy,
+    Regime,
+    Special,
+    balls,
+    economies,
+    regimes,
+    specials,
+)
+from ballsdex.settings import settings
+
+if TYPE_CHECKING:
+    import asyncpg.connection
+    from tortoise.backends.asyncpg.client import AsyncpgDBClient
+
+    from ballsdex.core.bot import BallsDexBot
+
+log = logging.getLogger("ballsdex.core.catalog")
+
+# must match the channel used by the admin panel, see bd_models/signals.py
+CHANNEL = "ballsdex_catalog"
+
+CATALOG: dict[str, tuple[type[models.Model], dict[int, models.Model]]] = {
+    "Ball": (Ball, cast(dict[int, models.Model], balls)),
+    "Regime": (Regime, cast(dict[int, models.Model], regimes)),
+    "Economy": (Economy, cast(dict[int, models.Model], economies)),
+    "Special": (Special, cast(dict[int, models.Model], specials)),
+}
+
+
+class CatalogListener:
+    """
+    Keep the cached catalog (balls, regimes, economies and specials) in sync with the database.
+
+    The admin panel sends a notification on the `ballsdex_catalog` Postgres channel each time
+    a catalog row is saved or deleted, with a JSON payload of the form
+    `{"model": "Ball", "id": 1, "deleted": false, "time": 1700000000.0}`. Only that row is
+    fetched again and replaced in the cache.
+
+    Notifications sent while the connection is lost are missed, so the whole catalog is
+    reloaded after each reconnection, and every `settings.catalog_resync_interval` seconds.
+    """
+
+    def __init__(self, bot: "BallsDexBot"):
+        self.bot = bot
+        self.task: asyncio.Task | None = None
+        # changes are applied in order, one at a time. None stands for a full reload
+        self.queue: asyncio.Queue[dict | None] = asyncio.Queue()
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self.run(), name="catalog-listener")
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def run(self):
+        consumer = asyncio.create_task(self.consume())
+        resync = (
+            asyncio.create_task(self.resync_periodically())
+            if settings.catalog_resync_interval > 0
+            else None
+        )
+        try:
+            await self.listen()
+        finally:
+            consumer.cancel()
+            if resync:
+                resync.cancel()
+
+    async def listen(self):
+        client = cast("AsyncpgDBClient", Tortoise.get_connection("default"))
+        first = True
+        retry_delay = 1
+        while True:
+            lost = asyncio.Event()
+            try:
+                conn: "asyncpg.connection.Connection"
+                async with client.acquire_connection() as conn:
+                    conn.add_termination_listener(lambda _: lost.set())
+                    await conn.add_listener(CHANNEL, self.on_notification)
+                    log.info("Listening to catalog changes.")
+                    retry_delay = 1
+                    if not first:
+                        # notifications may have been missed
+                        self.queue.put_nowait(None)
+                    first = False
+                    try:
+                        await lost.wait()
+                    finally:
+                        if not conn.is_closed():
+                            await conn.remove_listener(CHANNEL, self.on_notification)
+                log.warning("Lost the catalog listener connection, reconnecting...")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception(f"Failed to listen to catalog changes, retrying in {retry_delay}s")
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, 60)
+
+    def on_notification(self, connection, pid: int, channel: str, payload: str):
+        try:
+            notification = json.loads(payload)
+        except ValueError:
+            log.warning(f"Invalid catalog notification: {payload!r}")
+            return
+        if notification.get("model") not in CATALOG:
+            log.warning(f"Catalog notification for an unknown model: {payload!r}")
+            return
+        self.queue.put_nowait(notification)
+
+    async def consume(self):
+        while True:
+            notification = await self.queue.get()
+            try:
+                if notification is None:
+                    await self.resync()
+                else:
+                    await self.apply(notification)
+            except Exception:
+                log.exception(f"Failed to apply catalog change {notification}")
+
+    async def apply(self, notification: dict):
+        """
+        Fetch the row of a catalog notification and replace it in the cache.
+        """
+        name: str = notification["model"]
+        pk: int = notification["id"]
+        model, cache = CATALOG[name]
+        previous = cache.get(pk)
+        instance = None if notification.get("deleted") else await model.get_or_none(pk=pk)
+        if instance is None:
+            cache.pop(pk, None)
+        else:
+            cache[pk] = instance
+
+        if model is Ball:
+            self.bot.build_ball_indexes()
+        elif model is Special:
+            self.bot.special_schedule.build(specials.values())
+        if isinstance(previous, Ball):
+            self.bot.wild_card_cache.discard(previous.wild_card)
+        if isinstance(instance, Ball):
+            self.bot.wild_card_cache.discard(instance.wild_card)
+            await self.bot.render_pool.preload([instance], [], [], [])
+        elif isinstance(instance, Regime):
+            await self.bot.render_pool.preload([], [instance], [], [])
+        elif isinstance(instance, Economy):
+            await self.bot.render_pool.preload([], [], [instance], [])
+        elif isinstance(instance, Special):
+            await self.bot.render_pool.preload([], [], [], [instance])
+
+        if sent := notification.get("time"):
+            catalog_invalidation_lag.labels(model=name).observe(max(time.time() - sent, 0))
+        log.debug(f"Catalog {name} {pk} {'removed' if instance is None else 'updated'}")
+
+    async def resync(self):
+        """
+        Reload the whole catalog from the database.
+        """
+        await self.bot.load_catalog()
+        catalog_resyncs.inc()
+
+    async def resync_periodically(self):
+        while True:
+            await asyncio.sleep(settings.catalog_resync_interval)
+            self.queue.put_nowait(None)
@@ -107,8 +107,9 @@ class Core(commands.Cog):
         """
         Reload the cache of database models.
 
-        This is needed each time the database is updated, otherwise changes won't reflect until
-        next start.
+        Catalog changes made in the admin panel are applied automatically, unless disabled in
+        the configuration. This is still needed after editing the database directly, otherwise
+        changes won't reflect until next start.
         """
         await self.bot.load_cache()
         await ctx.message.add_reaction("✅")
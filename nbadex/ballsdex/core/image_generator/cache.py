@@ -0,0 +1,156 @@
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from cachetools import LRUCache
+
+from ballsdex.core.image_generator.image_gen import CARD_TEMPLATE_VERSION, CardData, EncoderOptions
+from ballsdex.core.metrics import card_cache_evictions, card_cache_hits, card_cache_misses
+
+log = logging.getLogger("ballsdex.core.image_generator.cache")
+
+
+def card_cache_key(card: CardData, options: EncoderOptions) -> str:
+    """
+    Build a content-addressed key for a rendered card.
+
+    `CardData` holds every value that has an effect on the pixels of the card, and
+    `EncoderOptions` on the encoded file. If the card design itself is modified, bump
+    `CARD_TEMPLATE_VERSION` instead.
+    """
+    return hashlib.sha256(repr((CARD_TEMPLATE_VERSION, card, options)).encode()).hexdigest()
+
+
+class _MemoryTier(LRUCache):
+    def popitem(self):
+        key, value = super().popitem()
+        card_cache_evictions.labels(tier="memory").inc()
+        return key, value
+
+
+class RenderCache:
+    """
+    Two-tier cache of encoded card images, indexed with `card_cache_key`.
+
+    The first tier is an in-memory LRU bounded by the total size of the stored buffers. The
+    second tier is an optional directory on disk, also bounded in size, which survives restarts.
+    Entries that are found on disk are promoted to memory.
+
+    This object is thread-safe, rendering happens outside of the event loop.
+
+    Parameters
+    ----------
+    memory_size: int
+        Maximum number of bytes held in memory. 0 disables the memory tier.
+    disk_path: Path | None
+        Directory of the disk tier. `None` disables the disk tier.
+    disk_size: int
+        Maximum number of bytes held on disk.
+    """
+
+    def __init__(self, memory_size: int, disk_path: Path | None = None, disk_size: int = 0):
+        self.memory: LRUCache[str, bytes] | None = (
+            _MemoryTier(maxsize=memory_size, getsizeof=len) if memory_size > 0 else None
+        )
+        self.disk_path = disk_path
+        self.disk_size = disk_size
+        self.disk_usage = 0
+        # key -> size, ordered from least to most recently used
+        self.disk_index: OrderedDict[str, int] = OrderedDict()
+        self.lock = threading.Lock()
+        if self.disk_path is not None:
+            self._load_disk_index()
+
+    def _load_disk_index(self):
+        assert self.disk_path
+        self.disk_path.mkdir(parents=True, exist_ok=True)
+        entries = sorted(
+            (entry for entry in os.scandir(self.disk_path) if entry.is_file()),
+            key=lambda x: x.stat().st_mtime,
+        )
+        for entry in entries:
+            if entry.name.endswith(".tmp"):
+                os.unlink(entry.path)
+                continue
+            size = entry.stat().st_size
+            self.disk_index[entry.name] = size
+            self.disk_usage += size
+        self._evict_disk()
+        log.debug(f"Loaded {len(self.disk_index)} rendered cards from disk cache.")
+
+    def _evict_disk(self):
+        assert self.disk_path
+        while self.disk_usage > self.disk_size and self.disk_index:
+            key, size = self.disk_index.popitem(last=False)
+            self.disk_usage -= size
+            try:
+                os.unlink(self.disk_path / key)
+            except FileNotFoundError:
+                pass
+            card_cache_evictions.labels(tier="disk").inc()
+
+    def get(self, key: str, *, memory_only: bool = False) -> bytes | None:
+        """
+        Return the cached card for this key, if any.
+
+        With `memory_only`, the disk tier is not looked up and misses are not counted. This
+        is safe to call from the event loop.
+        """
+        with self.lock:
+            if self.memory is not None and (data := self.memory.get(key)) is not None:
+                card_cache_hits.labels(tier="memory").inc()
+                return data
+            if memory_only:
+                return None
+            if self.disk_path is None or key not in self.disk_index:
+                card_cache_misses.inc()
+                return None
+            self.disk_index.move_to_end(key)
+        try:
+            data = (self.disk_path / key).read_bytes()
+        except FileNotFoundError:  # still being written by another thread
+            card_cache_misses.inc()
+            return None
+        card_cache_hits.labels(tier="disk").inc()
+        with self.lock:
+            if self.memory is not None:
+                try:
+                    self.memory[key] = data
+                except ValueError:  # larger than the whole tier
+                    pass
+        return data
+
+    def set(self, key: str, data: bytes):
+        with self.lock:
+            if self.memory is not None:
+                try:
+                    self.memory[key] = data
+                except ValueError:  # larger than the whole tier
+                    pass
+            if self.disk_path is None or key in self.disk_index or len(data) > self.disk_size:
+                return
+            # reserve the entry now to avoid concurrent writes of the same card
+            self.disk_index[key] = len(data)
+            self.disk_usage += len(data)
+            self._evict_disk()
+        tmp_path = self.disk_path / f"{key}.{threading.get_ident()}.tmp"
+        try:
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, self.disk_path / key)
+        except OSError:
+            log.warning("Failed to write rendered card to disk cache", exc_info=True)
+            with self.lock:
+                if size := self.disk_index.pop(key, None):
+                    self.disk_usage -= size
+
+    def clear(self):
+        """
+        Drop the memory tier. Disk entries are content-addressed and do not need to be cleared,
+        outdated ones will be evicted over time.
+        """
+        with self.lock:
+            if self.memory is not None:
+                self.memory.clear()
@@ -1,14 +1,23 @@
+import functools
+import json
+import logging
+import math
 import os
 import textwrap
+import threading
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, Iterable
 
-from PIL import Image, ImageDraw, ImageFont, ImageOps
+from cachetools import LRUCache
+from PIL import Image, ImageDraw, ImageFont, ImageOps, ImageStat
 
 from ballsdex.settings import settings
 
 if TYPE_CHECKING:
-    from ballsdex.core.models import BallInstance
+    from ballsdex.core.models import Ball, BallInstance, Economy, Regime, Special
+
+log = logging.getLogger("ballsdex.core.image_generator")
 
 
 SOURCES_PATH = Path(os.path.dirname(os.path.abspath(__file__)), "./src")
@@ -21,6 +30,17 @@ RECTANGLE_HEIGHT = (HEIGHT // 5) * 2
 CORNERS = ((34, 261), (1393, 992))
 artwork_size = [b - a for a, b in zip(*CORNERS)]
 
+# scale of the cards rendered for thumbnails, 375x500
+THUMBNAIL_SCALE = 0.25
+
+# Increase this number whenever the design of the card changes, this invalidates previously
+# rendered cards that are stored in cache
+CARD_TEMPLATE_VERSION = 1
+
+# content types of the supported card formats, `Image.MIME` is only filled once every plugin
+# is loaded
+CONTENT_TYPES = {"WEBP": "image/webp", "PNG": "image/png", "JPEG": "image/jpeg"}
+
 # ===== TIP =====
 #
 # If you want to quickly test the image generation, there is a CLI tool to quickly generate
@@ -33,130 +53,584 @@ artwork_size = [b - a for a, b in zip(*CORNERS)]
 # image viewer. There are options available to specify the ball or the special background,
 # use the "--help" flag to view all options.
 
-title_font = ImageFont.truetype(str(SOURCES_PATH / "ArsenicaTrial-Extrabold.ttf"), 170)
-capacity_name_font = ImageFont.truetype(str(SOURCES_PATH / "Bobby Jones Soft.otf"), 110)
-capacity_description_font = ImageFont.truetype(str(SOURCES_PATH / "OpenSans-Semibold.ttf"), 75)
-stats_font = ImageFont.truetype(str(SOURCES_PATH / "Bobby Jones Soft.otf"), 130)
-credits_font = ImageFont.truetype(str(SOURCES_PATH / "arial.ttf"), 40)
+FontKey = tuple[str, int]
+
+TITLE_FONT: FontKey = ("ArsenicaTrial-Extrabold.ttf", 170)
+CAPACITY_NAME_FONT: FontKey = ("Bobby Jones Soft.otf", 110)
+CAPACITY_DESCRIPTION_FONT: FontKey = ("OpenSans-Semibold.ttf", 75)
+STATS_FONT: FontKey = ("Bobby Jones Soft.otf", 130)
+CREDITS_FONT: FontKey = ("arial.ttf", 40)
+
+ICON_SIZE = (192, 192)
+
+AssetKey = tuple[str, float, tuple[int, int] | None]
+# text, font, stroke width, anchor
+TextKey = tuple[str, FontKey, int, str | None]
+Color = tuple[int, int, int, int]
+# position, text, font, fill and stroke width
+TextLine = tuple[tuple[int, int], str, FontKey, Color, int]
+
+
+def scale_point(point: tuple[int, int], scale: float) -> tuple[int, int]:
+    return (round(point[0] * scale), round(point[1] * scale))
+
+
+@functools.cache
+def get_font(font: FontKey) -> ImageFont.FreeTypeFont:
+    """
+    Return one of the fonts from the sources folder with the given size, loaded on first use.
+    """
+    name, size = font
+    return ImageFont.truetype(str(SOURCES_PATH / name), size)
+
+
+class ImageCache[K]:
+    """
+    Thread-safe LRU of images, bounded by the memory used by the pixels.
+
+    Images returned are shared and must not be modified, use `Image.copy` before drawing.
+
+    Parameters
+    ----------
+    size_setting: str
+        Name of the settings attribute holding the maximum size in megabytes. The cache is
+        lazily initialized since settings are not loaded on import.
+    """
+
+    def __init__(self, size_setting: str):
+        self.size_setting = size_setting
+        self._cache: LRUCache[K, Image.Image] | None = None
+        self.lock = threading.Lock()
+
+    @property
+    def cache(self) -> LRUCache[K, Image.Image]:
+        if self._cache is None:
+            self._cache = LRUCache(
+                maxsize=getattr(settings, self.size_setting) * 1024 * 1024,
+                getsizeof=lambda x: x.width * x.height * len(x.getbands()),
+            )
+        return self._cache
+
+    def get(self, key: K) -> Image.Image | None:
+        with self.lock:
+            return self.cache.get(key)
+
+    def set(self, key: K, image: Image.Image):
+        with self.lock:
+            try:
+                self.cache[key] = image
+            except ValueError:  # too large for the cache
+                pass
+
+    def clear(self):
+        with self.lock:
+            self.cache.clear()
+
+
+class AssetCache(ImageCache[AssetKey]):
+    """
+    Cache of decoded RGBA images used to build cards.
+
+    Entries are keyed by file path and modification time, so replacing a file on disk is picked
+    up without clearing the cache. When a size is requested, the image is stored already fitted
+    to that size.
+    """
+
+    def _load(self, path: str, size: tuple[int, int] | None) -> Image.Image:
+        with Image.open(path) as file:
+            image = file.convert("RGBA")
+        if size is not None:
+            image = ImageOps.fit(image, size)
+        return image
+
+    def load(self, path: str, size: tuple[int, int] | None = None) -> Image.Image:
+        """
+        Return the decoded RGBA image at the given path, optionally fitted to `size`.
+        """
+        key = (path, os.stat(path).st_mtime, size)
+        if (image := self.get(key)) is not None:
+            return image
+        image = self._load(path, size)
+        self.set(key, image)
+        return image
+
+    def warm(self, assets: Iterable[tuple[str, tuple[int, int] | None]]):
+        """
+        Decode the given assets ahead of time, stopping once the cache is full to avoid evicting
+        the first (most shared) entries.
+        """
+        count = 0
+        for path, size in assets:
+            try:
+                key = (path, os.stat(path).st_mtime, size)
+            except OSError:
+                log.warning(f"Cannot preload missing card asset {path}")
+                continue
+            with self.lock:
+                if key in self.cache:
+                    continue
+            try:
+                image = self._load(path, size)
+            except OSError:
+                log.warning(f"Cannot preload card asset {path}", exc_info=True)
+                continue
+            with self.lock:
+                if self.cache.currsize + self.cache.getsizeof(image) > self.cache.maxsize:
+                    break
+                self.cache[key] = image
+            count += 1
+        log.debug(f"Preloaded {count} card assets.")
+
+
+class TextCache(ImageCache[TextKey]):
+    """
+    Cache of rasterized text, avoiding text shaping and rendering on each card.
+
+    Entries are "LA" images, holding the coverage of the stroked text in the first band and of
+    the text without stroke in the second. Painting colors through these masks gives the same
+    pixels as `ImageDraw.text`.
+    """
+
+    def _rasterize(self, key: TextKey) -> Image.Image | None:
+        text, font_key, stroke_width, anchor = key
+        font = get_font(font_key)
+        left, top, right, bottom = ImageDraw.Draw(Image.new("L", (1, 1))).textbbox(
+            (0, 0), text, font=font, anchor=anchor, stroke_width=stroke_width
+        )
+        if right <= left or bottom <= top:
+            return None
+        bands: list[Image.Image] = []
+        for width in (stroke_width, 0):
+            band = Image.new("L", (right - left, bottom - top))
+            ImageDraw.Draw(band).text(
+                (-left, -top), text, fill=255, font=font, anchor=anchor, stroke_width=width
+            )
+            bands.append(band)
+        mask = Image.merge("LA", bands)
+        mask.info["offset"] = (left, top)
+        return mask
+
+    def draw(
+        self,
+        image: Image.Image,
+        xy: tuple[int, int],
+        text: str,
+        font: FontKey,
+        fill: Color = (255, 255, 255, 255),
+        stroke_width: int = 0,
+        stroke_fill: Color = (0, 0, 0, 255),
+        anchor: str | None = None,
+        scale: float = 1.0,
+    ):
+        """
+        Draw text on the image, same as `ImageDraw.text`. Multiline text with a stroke is not
+        supported.
+
+        The position, font size and stroke width are given for a full size card, and
+        multiplied by `scale`.
+        """
+        if scale != 1:
+            xy = scale_point(xy, scale)
+            font = (font[0], max(1, round(font[1] * scale)))
+            stroke_width = max(1, round(stroke_width * scale)) if stroke_width else 0
+        key = (text, font, stroke_width, anchor)
+        if (mask := self.get(key)) is None:
+            if (mask := self._rasterize(key)) is None:
+                return
+            self.set(key, mask)
+        left, top = mask.info["offset"]
+        position = (xy[0] + left, xy[1] + top)
+        if stroke_width:
+            image.paste(stroke_fill, position, mask.getchannel("L"))
+        if not stroke_width or fill != stroke_fill:
+            image.paste(fill, position, mask.getchannel("A"))
+
+
+@functools.lru_cache(maxsize=1024)
+def layout_ability(capacity_name: str, capacity_description: str) -> tuple[TextLine, ...]:
+    """
+    Wrap the ability name and description of a ball into lines ready to be drawn.
+    """
+    lines: list[TextLine] = []
+    cap_name = textwrap.wrap(f"Ability: {capacity_name}", width=26)
+    for i, line in enumerate(cap_name):
+        lines.append(((100, 1050 + 100 * i), line, CAPACITY_NAME_FONT, (230, 230, 230, 255), 2))
+
+    capacity_description_lines = (
+        wrapped_line
+        for newline in capacity_description.splitlines()
+        for wrapped_line in textwrap.wrap(newline, 32)
+    )
+    for i, line in enumerate(capacity_description_lines):
+        lines.append(
+            (
+                (60, 1100 + 100 * len(cap_name) + 80 * i),
+                line,
+                CAPACITY_DESCRIPTION_FONT,
+                (255, 255, 255, 255),
+                1,
+            )
+        )
+    return tuple(lines)
+
+
+class BrightnessManifest:
+    """
+    Average brightness of the bottom of each background, where the credits are written.
+
+    Values are computed once per file and modification time, then saved in a JSON manifest
+    inside the media folder, shared by the bot and the admin panel.
+    """
+
+    FILENAME = ".brightness.json"
+
+    def __init__(self):
+        # media path -> file name -> (modification time, brightness)
+        self.manifests: dict[str, dict[str, tuple[float, float]]] = {}
+        self.lock = threading.Lock()
+
+    def _read(self, media_path: str) -> dict[str, tuple[float, float]]:
+        try:
+            with open(media_path + self.FILENAME) as file:
+                return {k: (v[0], v[1]) for k, v in json.load(file).items()}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, TypeError, IndexError, AttributeError):
+            log.warning("Ignoring invalid brightness manifest", exc_info=True)
+            return {}
+
+    def _write(self, media_path: str, manifest: dict[str, tuple[float, float]]):
+        tmp_path = f"{media_path}{self.FILENAME}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w") as file:
+                json.dump(manifest, file)
+            os.replace(tmp_path, media_path + self.FILENAME)
+        except OSError:
+            log.warning("Failed to write brightness manifest", exc_info=True)
+
+    def _compute(self, path: str) -> float:
+        image = asset_cache.load(path)
+        region = image.crop((0, int(image.height * 0.8), image.width, image.height))
+        return ImageStat.Stat(region.convert("L")).mean[0]
+
+    def get(self, media_path: str, filename: str) -> float:
+        """
+        Return the brightness of the bottom of a background, from 0 to 255.
+        """
+        mtime = os.stat(media_path + filename).st_mtime
+        with self.lock:
+            if (manifest := self.manifests.get(media_path)) is None:
+                manifest = self.manifests[media_path] = self._read(media_path)
+            if (entry := manifest.get(filename)) and entry[0] == mtime:
+                return entry[1]
+        brightness = self._compute(media_path + filename)
+        with self.lock:
+            # merge with the entries written by other processes in the meantime
+            manifest = self.manifests[media_path] = self._read(media_path) | manifest
+            manifest[filename] = (mtime, brightness)
+            self._write(media_path, manifest)
+        return brightness
+
+    def warm(self, media_path: str, filenames: Iterable[str]):
+        for filename in filenames:
+            try:
+                self.get(media_path, filename)
+            except OSError:
+                log.warning(f"Cannot compute brightness of {filename}", exc_info=True)
 
-credits_color_cache = {}
 
+asset_cache = AssetCache("asset_cache_size")
+text_cache = TextCache("text_cache_size")
+brightness_manifest = BrightnessManifest()
+# cards without their stats, see `render_card`
+layer_cache: ImageCache["CardData"] = ImageCache("layer_cache_size")
 
-def get_credit_color(image: Image.Image, region: tuple) -> tuple:
-    image = image.crop(region)
-    brightness = sum(image.convert("L").getdata()) / image.width / image.height  # type: ignore
+
+def preload_assets(
+    balls: Iterable["Ball"],
+    regimes: Iterable["Regime"],
+    economies: Iterable["Economy"],
+    specials: Iterable["Special"],
+    media_path: str = "./admin_panel/media/",
+):
+    """
+    Fill the asset cache with the images used by the given models. Backgrounds and icons are
+    shared by many cards and are loaded first.
+    """
+    assets: list[tuple[str, tuple[int, int] | None]] = []
+    assets.extend((media_path + x.background, None) for x in regimes)
+    assets.extend((media_path + x.background, None) for x in specials if x.background)
+    assets.extend((media_path + x.icon, ICON_SIZE) for x in economies)
+    assets.extend((media_path + x.collection_card, tuple(artwork_size)) for x in balls)
+    asset_cache.warm(dict.fromkeys(assets))
+    backgrounds = [x.background for x in regimes] + [x.background for x in specials]
+    brightness_manifest.warm(media_path, dict.fromkeys(filter(None, backgrounds)))
+
+
+def get_credit_color(media_path: str, background: str) -> Color:
+    """
+    Return the color of the credits, depending on the brightness of the background.
+    """
+    brightness = brightness_manifest.get(media_path, background)
     return (0, 0, 0, 255) if brightness > 100 else (255, 255, 255, 255)
 
 
+@dataclass(frozen=True, slots=True)
+class EncoderOptions:
+    """
+    How a rendered card is encoded. The defaults are the ones of Pillow, use `from_settings` to
+    follow the configuration.
+    """
+
+    format: str = "WEBP"
+    quality: int = 80
+    method: int = 4
+    lossless: bool = False
+    # scale applied before encoding, 1 to keep the full size
+    scale: float = 1.0
+
+    @classmethod
+    def from_settings(cls, full_size: bool = True) -> "EncoderOptions":
+        """
+        Build the options from the configuration.
+
+        Parameters
+        ----------
+        full_size: bool
+            If `False`, the configured downscale is applied. Use this for the cards displayed
+            outside of the info command.
+        """
+        return cls(
+            format=settings.card_format,
+            quality=settings.card_quality,
+            method=settings.card_method,
+            lossless=settings.card_lossless,
+            scale=1.0 if full_size else settings.card_downscale,
+        )
+
+    @property
+    def extension(self) -> str:
+        return "jpg" if self.format == "JPEG" else self.format.lower()
+
+    @property
+    def content_type(self) -> str:
+        return CONTENT_TYPES[self.format]
+
+    def prepare(self, image: Image.Image) -> tuple[Image.Image, dict[str, Any]]:
+        """
+        Apply the scale to the image, and return it with the arguments for `Image.save`.
+        """
+        if self.scale < 1:
+            image = image.resize(
+                (round(image.width * self.scale), round(image.height * self.scale)),
+                Image.Resampling.LANCZOS,
+            )
+        match self.format:
+            case "WEBP":
+                kwargs = {
+                    "quality": self.quality,
+                    "method": self.method,
+                    "lossless": self.lossless,
+                }
+            case "JPEG":
+                # no transparency, the corners of the card become black
+                image = image.convert("RGB")
+                kwargs = {"quality": self.quality}
+            case _:
+                kwargs = {}
+        return image, {"format": self.format, **kwargs}
+
+
+@dataclass(frozen=True, slots=True)
+class CardData:
+    """
+    Snapshot of everything that affects the pixels of a card, detached from the database models.
+
+    This can be hashed for caching and sent to other processes for rendering. Build it from a
+    ball instance with `from_instance`.
+    """
+
+    ball_id: int
+    special_id: int | None
+    title: str
+    capacity_name: str
+    capacity_description: str
+    credits: str
+    special_credits: str | None
+    background: str
+    collection_card: str
+    economy_icon: str | None
+    health: int
+    attack: int
+    rarity: float | None
+    # size of the card relative to the full 1500x2000 card
+    scale: float = 1.0
+
+    @classmethod
+    def from_instance(cls, ball_instance: "BallInstance", scale: float = 1.0) -> "CardData":
+        ball = ball_instance.countryball
+        special = ball_instance.specialcard
+        economy = ball.cached_economy
+        background = ball_instance.special_card or ball.cached_regime.background
+        return cls(
+            ball_id=ball.pk,
+            special_id=special.pk if special else None,
+            title=ball.short_name or ball.country,
+            capacity_name=ball.capacity_name,
+            capacity_description=ball.capacity_description,
+            credits=ball.credits,
+            special_credits=special.credits if special else None,
+            background=background,
+            collection_card=ball.collection_card,
+            economy_icon=economy.icon if economy else None,
+            health=ball_instance.health,
+            attack=ball_instance.attack,
+            rarity=ball.rarity if settings.show_rarity else None,
+            scale=scale,
+        )
+
+
 def draw_card(
     ball_instance: "BallInstance",
     media_path: str = "./admin_panel/media/",
+    options: EncoderOptions | None = None,
 ) -> tuple[Image.Image, dict[str, Any]]:
-    ball = ball_instance.countryball
-    ball_health = (237, 115, 101, 255)
-    ball_credits = ball.credits
+    return render_card(CardData.from_instance(ball_instance), media_path, options)
+
+
+def draw_static_layer(card: CardData, media_path: str) -> Image.Image:
+    """
+    Draw everything on the card except the stats, which are the only parts that vary between
+    instances of the same ball and special.
+
+    Smaller cards are drawn directly at their size, from downscaled assets.
+    """
+    scale = card.scale
     special_credits = ""
-    card_name = ball.cached_regime.name
-    if special_image := ball_instance.special_card:
-        card_name = getattr(ball_instance.specialcard, "name", card_name)
-        image = Image.open(media_path + special_image)
-        if ball_instance.specialcard and ball_instance.specialcard.credits:
-            special_credits += f" • Special Author: {ball_instance.specialcard.credits}"
-    else:
-        image = Image.open(media_path + ball.cached_regime.background)
-    image = image.convert("RGBA")
+    if card.special_credits:
+        special_credits += f" • Special Author: {card.special_credits}"
+    background_size = None if scale == 1 else scale_point((WIDTH, HEIGHT), scale)
+    image = asset_cache.load(media_path + card.background, background_size).copy()
     icon = (
-        Image.open(media_path + ball.cached_economy.icon).convert("RGBA")
-        if ball.cached_economy
+        asset_cache.load(media_path + card.economy_icon, scale_point(ICON_SIZE, scale))
+        if card.economy_icon
         else None
     )
 
-    draw = ImageDraw.Draw(image)
-    draw.text(
-        (50, 20),
-        ball.short_name or ball.country,
-        font=title_font,
-        stroke_width=2,
-        stroke_fill=(0, 0, 0, 255),
-    )
+    text_cache.draw(image, (50, 20), card.title, TITLE_FONT, stroke_width=2, scale=scale)
 
-    cap_name = textwrap.wrap(f"Ability: {ball.capacity_name}", width=26)
+    for xy, line, font, fill, stroke_width in layout_ability(
+        card.capacity_name, card.capacity_description
+    ):
+        text_cache.draw(image, xy, line, font, fill, stroke_width, scale=scale)
 
-    for i, line in enumerate(cap_name):
-        draw.text(
-            (100, 1050 + 100 * i),
-            line,
-            font=capacity_name_font,
-            fill=(230, 230, 230, 255),
-            stroke_width=2,
-            stroke_fill=(0, 0, 0, 255),
+    if card.rarity is not None:
+        text_cache.draw(
+            image, (1200, 50), str(card.rarity), STATS_FONT, stroke_width=2, scale=scale
         )
+    credits_color = get_credit_color(media_path, card.background)
+    text_cache.draw(
+        image,
+        (30, 1870),
+        # Modifying the line below is breaking the licence as you are removing credits
+        # If you don't want to receive a DMCA, just don't
+        f"Created by El Laggron{special_credits}\n" f"Artwork author: {card.credits}",
+        CREDITS_FONT,
+        fill=credits_color,
+        scale=scale,
+    )
 
-    capacity_description_lines = (
-        wrapped_line
-        for newline in ball.capacity_description.splitlines()
-        for wrapped_line in textwrap.wrap(newline, 32)
+    artwork = asset_cache.load(
+        media_path + card.collection_card, scale_point(tuple(artwork_size), scale)
     )
+    image.paste(artwork, scale_point(CORNERS[0], scale))
+
+    if icon:
+        image.paste(icon, scale_point((1200, 30), scale), mask=icon)
+
+    return image
 
-    for i, line in enumerate(capacity_description_lines):
-        draw.text(
-            (60, 1100 + 100 * len(cap_name) + 80 * i),
-            line,
-            font=capacity_description_font,
-            stroke_width=1,
-            stroke_fill=(0, 0, 0, 255),
-        )
 
-    draw.text(
+def draw_stats(image: Image.Image, card: CardData):
+    text_cache.draw(
+        image,
         (320, 1670),
-        str(ball_instance.health),
-        font=stats_font,
-        fill=ball_health,
+        str(card.health),
+        STATS_FONT,
+        fill=(237, 115, 101, 255),
         stroke_width=1,
-        stroke_fill=(0, 0, 0, 255),
+        scale=card.scale,
     )
-    draw.text(
+    text_cache.draw(
+        image,
         (1120, 1670),
-        str(ball_instance.attack),
-        font=stats_font,
+        str(card.attack),
+        STATS_FONT,
         fill=(252, 194, 76, 255),
         stroke_width=1,
-        stroke_fill=(0, 0, 0, 255),
         anchor="ra",
-    )
-    if settings.show_rarity:
-        draw.text(
-            (1200, 50),
-            str(ball.rarity),
-            font=stats_font,
-            stroke_width=2,
-            stroke_fill=(0, 0, 0, 255),
-        )
-    if card_name in credits_color_cache:
-        credits_color = credits_color_cache[card_name]
-    else:
-        credits_color = get_credit_color(
-            image, (0, int(image.height * 0.8), image.width, image.height)
-        )
-        credits_color_cache[card_name] = credits_color
-    draw.text(
-        (30, 1870),
-        # Modifying the line below is breaking the licence as you are removing credits
-        # If you don't want to receive a DMCA, just don't
-        f"Created by El Laggron{special_credits}\n" f"Artwork author: {ball_credits}",
-        font=credits_font,
-        fill=credits_color,
-        stroke_width=0,
-        stroke_fill=(255, 255, 255, 255),
+        scale=card.scale,
     )
 
-    artwork = Image.open(media_path + ball.collection_card).convert("RGBA")
-    image.paste(ImageOps.fit(artwork, artwork_size), CORNERS[0])  # type: ignore
 
-    if icon:
-        icon = ImageOps.fit(icon, (192, 192))
-        image.paste(icon, (1200, 30), mask=icon)
-        icon.close()
-    artwork.close()
+def render_card(
+    card: CardData,
+    media_path: str = "./admin_panel/media/",
+    options: EncoderOptions | None = None,
+) -> tuple[Image.Image, dict[str, Any]]:
+    # the static layer is shared by all instances of a ball with the same special
+    layer_key = replace(card, health=0, attack=0)
+    if (layer := layer_cache.get(layer_key)) is None:
+        layer = draw_static_layer(card, media_path)
+        layer_cache.set(layer_key, layer)
+    image = layer.copy()
+    draw_stats(image, card)
+    return (options or EncoderOptions.from_settings()).prepare(image)
 
-    return image, {"format": "WEBP"}
+
+def render_contact_sheet(
+    cards: list[CardData],
+    media_path: str = "./admin_panel/media/",
+    options: EncoderOptions | None = None,
+    *,
+    max_width: int = 2000,
+    max_card_width: int = 375,
+    spacing: int = 10,
+) -> tuple[Image.Image, dict[str, Any]]:
+    """
+    Render multiple cards as a single downscaled grid image.
+
+    Parameters
+    ----------
+    cards: list[CardData]
+        The cards to render, in order. Must not be empty.
+    media_path: str
+        Path to the directory containing uploaded media.
+    options: EncoderOptions | None
+        How the image is encoded, the scale is ignored. Defaults to the configuration.
+    max_width: int
+        Maximum width of the whole image, cards are made smaller to fit.
+    max_card_width: int
+        Maximum width of a single card.
+    spacing: int
+        Space between cards, in pixels.
+    """
+    columns = min(len(cards), math.ceil(math.sqrt(len(cards))) + 1)
+    rows = math.ceil(len(cards) / columns)
+    card_width = min(max_card_width, (max_width - spacing * (columns - 1)) // columns)
+    scale = card_width / WIDTH
+    card_width, card_height = scale_point((WIDTH, HEIGHT), scale)
+
+    sheet = Image.new(
+        "RGBA",
+        (
+            columns * card_width + spacing * (columns - 1),
+            rows * card_height + spacing * (rows - 1),
+        ),
+    )
+    for i, card in enumerate(cards):
+        image, _ = render_card(replace(card, scale=scale), media_path, EncoderOptions())
+        row, column = divmod(i, columns)
+        sheet.paste(image, (column * (card_width + spacing), row * (card_height + spacing)))
+    options = replace(options or EncoderOptions.from_settings(), scale=1.0)
+    return options.prepare(sheet)
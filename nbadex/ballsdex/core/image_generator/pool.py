@@ -0,0 +1,271 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from io import BytesIO
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Literal
+
+from PIL import Image
+
+from ballsdex.core.image_generator.cache import RenderCache, card_cache_key
+from ballsdex.core.image_generator.image_gen import (
+    THUMBNAIL_SCALE,
+    CardData,
+    EncoderOptions,
+    preload_assets,
+    render_card,
+    render_contact_sheet,
+)
+from ballsdex.core.metrics import card_render_queue_depth, card_render_time
+from ballsdex.settings import Settings, settings
+
+if TYPE_CHECKING:
+    from ballsdex.core.models import Ball, BallInstance, Economy, Regime, Special
+
+log = logging.getLogger("ballsdex.core.image_generator.pool")
+
+
+def _init_worker(parent_settings: Settings):
+    """
+    Initializer of the rendering processes. Settings are not read from the config file in
+    children, they are copied from the parent instead.
+    """
+    # Ctrl+C is handled by the main process, which will shut the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    vars(settings).update(vars(parent_settings))
+
+
+def create_process_pool(workers: int | None = None) -> ProcessPoolExecutor:
+    """
+    Create a pool of processes ready to render cards, with the settings of this process.
+    """
+    return ProcessPoolExecutor(
+        workers,
+        # forking a process with a running event loop and threads is unsafe
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(settings,),
+    )
+
+
+def render_to_file(card: CardData, options: EncoderOptions, media_path: str, path: str) -> int:
+    """
+    Render a card and write it to the given path, returning the size of the file. The file is
+    replaced atomically.
+    """
+    image, kwargs = render_card(card, media_path, options)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as file:
+        image.save(file, **kwargs)
+        size = file.tell()
+    image.close()
+    os.replace(tmp_path, path)
+    return size
+
+
+def _encode(image: Image.Image, kwargs: dict[str, Any]) -> bytes:
+    buffer = BytesIO()
+    image.save(buffer, **kwargs)
+    image.close()
+    return buffer.getvalue()
+
+
+def _render(card: CardData, options: EncoderOptions, media_path: str) -> bytes:
+    return _encode(*render_card(card, media_path, options))
+
+
+def _render_contact_sheet(
+    cards: list[CardData], options: EncoderOptions, media_path: str
+) -> bytes:
+    return _encode(*render_contact_sheet(cards, media_path, options))
+
+
+class RenderPool:
+    """
+    Long-lived pool of workers rendering cards outside of the event loop, owned by the bot.
+
+    In thread mode, the workers share the caches of the main process. In process mode, each
+    worker keeps its own fonts and decoded assets in memory, but rendering does not contend
+    for the GIL with the event loop.
+
+    Submissions are bounded: once `queue_size` cards are waiting or being rendered, callers wait
+    for a slot before submitting more work. Contact sheets take one slot per card.
+
+    Parameters
+    ----------
+    cache: RenderCache
+        Cache of rendered cards, looked up before submitting work.
+    mode: Literal["thread", "process"]
+        Whether to use a thread or process pool.
+    workers: int | None
+        Number of workers. Defaults to the number of CPUs.
+    queue_size: int
+        Maximum number of cards waiting or being rendered at the same time.
+    media_path: str
+        Path to the directory containing uploaded media.
+    """
+
+    def __init__(
+        self,
+        cache: RenderCache,
+        mode: Literal["thread", "process"] = "thread",
+        workers: int | None = None,
+        queue_size: int = 64,
+        media_path: str = "./admin_panel/media/",
+    ):
+        self.cache = cache
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = max(queue_size, self.workers)
+        self.media_path = media_path
+        self.pending = 0
+        # renders in progress, to avoid drawing the same card twice concurrently
+        self.inflight: dict[str, asyncio.Future[bytes]] = {}
+        self.semaphore = asyncio.Semaphore(self.queue_size)
+        # only one submission takes several slots at a time, two of them holding part of the
+        # slots they need would wait for each other forever
+        self.batch_lock = asyncio.Lock()
+
+        self.executor: Executor
+        if mode == "process":
+            self.executor = create_process_pool(self.workers)
+        else:
+            self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix="card-render")
+        log.debug(f"Card rendering pool started with {self.workers} {mode} workers.")
+
+    async def _acquire(self, slots: int):
+        if slots == 1:
+            await self.semaphore.acquire()
+            return
+        acquired = 0
+        try:
+            async with self.batch_lock:
+                for _ in range(slots):
+                    await self.semaphore.acquire()
+                    acquired += 1
+        except BaseException:
+            for _ in range(acquired):
+                self.semaphore.release()
+            raise
+
+    async def _run[T](self, func: Callable[..., T], *args: Any, cards: int = 1) -> T:
+        # batches larger than the queue would never get all of their slots
+        slots = min(cards, self.queue_size)
+        self.pending += cards
+        card_render_queue_depth.observe(self.pending)
+        try:
+            await self._acquire(slots)
+            try:
+                start = time.perf_counter()
+                result = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, func, *args, self.media_path
+                )
+                card_render_time.labels(mode=self.mode).observe(time.perf_counter() - start)
+                return result
+            finally:
+                for _ in range(slots):
+                    self.semaphore.release()
+        finally:
+            self.pending -= cards
+
+    async def submit(self, card: CardData, options: EncoderOptions) -> bytes:
+        """
+        Render the card in the pool, bypassing the cache.
+        """
+        return await self._run(_render, card, options)
+
+    async def render(
+        self, ball_instance: "BallInstance", *, full_size: bool = True, thumbnail: bool = False
+    ) -> BytesIO:
+        """
+        Return the rendered card of a ball instance, from cache if possible.
+
+        Parameters
+        ----------
+        ball_instance: BallInstance
+            The ball instance to render.
+        full_size: bool
+            If `False`, the configured downscale is applied.
+        thumbnail: bool
+            Render a small card instead, at `THUMBNAIL_SCALE`. The downscale is not applied.
+        """
+        card = CardData.from_instance(ball_instance, THUMBNAIL_SCALE if thumbnail else 1.0)
+        options = EncoderOptions.from_settings(full_size or thumbnail)
+        key = card_cache_key(card, options)
+        has_disk = self.cache.disk_path is not None
+        # disk lookups are done outside of the event loop
+        data = self.cache.get(key, memory_only=has_disk)
+        if data is None and has_disk:
+            data = await asyncio.to_thread(self.cache.get, key)
+        if data is not None:
+            return BytesIO(data)
+        if future := self.inflight.get(key):
+            return BytesIO(await asyncio.shield(future))
+
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+        try:
+            data = await self.submit(card, options)
+            if has_disk:
+                await asyncio.to_thread(self.cache.set, key, data)
+            else:
+                self.cache.set(key, data)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # avoid "exception was never retrieved" warnings when nobody else waited
+            future.exception()
+            raise
+        else:
+            future.set_result(data)
+        finally:
+            del self.inflight[key]
+        return BytesIO(data)
+
+    async def render_contact_sheet(self, ball_instances: list["BallInstance"]) -> BytesIO:
+        """
+        Render multiple ball instances as a single downscaled grid image. This is not cached.
+        """
+        if not ball_instances:
+            raise ValueError("At least one ball instance is required")
+        cards = [CardData.from_instance(x) for x in ball_instances]
+        return BytesIO(
+            await self._run(
+                _render_contact_sheet, cards, EncoderOptions.from_settings(), cards=len(cards)
+            )
+        )
+
+    async def preload(
+        self,
+        balls: Iterable["Ball"],
+        regimes: Iterable["Regime"],
+        economies: Iterable["Economy"],
+        specials: Iterable["Special"],
+    ):
+        """
+        Warm the asset cache shared by the workers. In process mode, each worker fills its own
+        cache as it renders cards, there is nothing to do here.
+        """
+        if self.mode == "process":
+            return
+        await asyncio.get_running_loop().run_in_executor(
+            self.executor,
+            preload_assets,
+            list(balls),
+            list(regimes),
+            list(economies),
+            list(specials),
+            self.media_path,
+        )
+
+    async def close(self):
+        """
+        Wait for running renders to complete and stop the workers. Queued work is cancelled.
+        """
+        await asyncio.to_thread(self.executor.shutdown, wait=True, cancel_futures=True)
+        log.debug("Card rendering pool stopped.")
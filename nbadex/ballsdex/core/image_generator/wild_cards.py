@@ -0,0 +1,214 @@
+import logging
+import os
+import threading
+from io import BytesIO
+from typing import TYPE_CHECKING, Iterable
+
+from cachetools import LRUCache
+from PIL import Image
+
+from ballsdex.core.image_generator.image_gen import EncoderOptions
+from ballsdex.settings import settings
+
+if TYPE_CHECKING:
+    from ballsdex.core.models import Ball
+
+log = logging.getLogger("ballsdex.core.image_generator.wild_cards")
+
+# suffix appended to the path of a wild card for its pre-processed copy
+OPTIMIZED_SUFFIX = ".spawn.webp"
+
+
+def is_up_to_date(path: str, destination: str) -> bool:
+    try:
+        return os.stat(destination).st_mtime >= os.stat(path).st_mtime
+    except FileNotFoundError:
+        return False
+
+
+def optimize_wild_card(path: str) -> str | None:
+    """
+    Write a copy of a wild card downsized to `settings.wild_card_max_size` pixels and
+    re-encoded as WEBP with the card quality settings, next to the original file.
+
+    Nothing is written if the copy is already up to date, if the wild card is animated, or if
+    the copy would not be smaller than the original.
+
+    Parameters
+    ----------
+    path: str
+        Path of the original wild card.
+
+    Returns
+    -------
+    str | None
+        The path of the copy, or `None` if the original file should be used.
+    """
+    if settings.wild_card_max_size <= 0:
+        return None
+    destination = path + OPTIMIZED_SUFFIX
+    if is_up_to_date(path, destination):
+        return destination
+
+    with Image.open(path) as image:
+        if getattr(image, "is_animated", False):
+            return None
+        image.load()
+        image.thumbnail((settings.wild_card_max_size, settings.wild_card_max_size))
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        # always WEBP, spawn images are usually transparent
+        options = EncoderOptions(
+            "WEBP", settings.card_quality, settings.card_method, settings.card_lossless
+        )
+        image, kwargs = options.prepare(image)
+        buffer = BytesIO()
+        image.save(buffer, **kwargs)
+
+    original_size = os.path.getsize(path)
+    if buffer.tell() >= original_size:
+        log.debug("Optimized copy of %s is not smaller than the original, skipping", path)
+        try:
+            os.unlink(destination)
+        except FileNotFoundError:
+            pass
+        return None
+
+    tmp = destination + ".tmp"
+    with open(tmp, "wb") as file:
+        file.write(buffer.getbuffer())
+    os.replace(tmp, destination)
+    log.info(
+        "Optimized wild card %s from %d to %d KiB",
+        path,
+        original_size // 1024,
+        buffer.tell() // 1024,
+    )
+    return destination
+
+
+def find_wild_card(path: str) -> str:
+    """
+    Return the path of the file that should be uploaded for a wild card: its pre-processed
+    copy if it is up to date, otherwise the original.
+    """
+    destination = path + OPTIMIZED_SUFFIX
+    return destination if is_up_to_date(path, destination) else path
+
+
+class WildCardCache:
+    """
+    In-memory cache of the files uploaded when spawning, indexed with the wild card path of
+    the ball. Bounded by the total size of the stored files, the least recently spawned ones
+    are read from disk again when needed.
+
+    This object is thread-safe, files are read outside of the event loop.
+
+    Parameters
+    ----------
+    media_path: str
+        Directory where the wild cards are uploaded.
+    max_size: int
+        Maximum number of bytes held in memory. 0 disables the cache.
+    """
+
+    def __init__(self, media_path: str, max_size: int):
+        self.media_path = media_path
+        self.max_size = max_size
+        self.files = self._new_cache()
+        self.lock = threading.Lock()
+
+    def _new_cache(self) -> LRUCache[str, tuple[str, bytes]] | None:
+        if self.max_size <= 0:
+            return None
+        return LRUCache(maxsize=self.max_size, getsizeof=lambda x: len(x[1]))
+
+    def read(self, wild_card: str) -> tuple[str, bytes]:
+        """
+        Read the file to upload for a wild card from disk, without caching it.
+
+        Returns
+        -------
+        tuple[str, bytes]
+            The extension and contents of the file.
+        """
+        return self._read_file(find_wild_card(self.media_path + wild_card))
+
+    def _read_file(self, path: str) -> tuple[str, bytes]:
+        with open(path, "rb") as file:
+            return path.rsplit(".", 1)[-1], file.read()
+
+    def get_cached(self, wild_card: str) -> tuple[str, bytes] | None:
+        """
+        Return the file to upload for a wild card if it is in memory, `None` otherwise.
+
+        This never blocks and can be called from the event loop, `None` is also returned if
+        another thread holds the lock. Use `get` in a thread when this returns `None`.
+        """
+        if self.files is None or not self.lock.acquire(blocking=False):
+            return None
+        try:
+            return self.files.get(wild_card)
+        finally:
+            self.lock.release()
+
+    def get(self, wild_card: str) -> tuple[tuple[str, bytes], bool]:
+        """
+        Return the file to upload for a wild card, reading it from disk if it's not cached.
+
+        Returns
+        -------
+        tuple[tuple[str, bytes], bool]
+            The extension and contents of the file, and whether it was served from memory.
+        """
+        if self.files is None:
+            return self.read(wild_card), False
+        with self.lock:
+            if (entry := self.files.get(wild_card)) is not None:
+                return entry, True
+        entry = self.read(wild_card)
+        with self.lock:
+            try:
+                self.files[wild_card] = entry
+            except ValueError:  # larger than the whole cache
+                pass
+        return entry, False
+
+    def discard(self, wild_card: str):
+        """
+        Remove a wild card from the cache, if present.
+        """
+        if self.files is None:
+            return
+        with self.lock:
+            self.files.pop(wild_card, None)
+
+    def load(self, balls: "Iterable[Ball]"):
+        """
+        Replace the cache with the wild cards of the enabled balls, most common first, until
+        the cache is full. The current entries are served until the new ones are loaded.
+        """
+        files = self._new_cache()
+        if files is None:
+            return
+        for ball in sorted(balls, key=lambda x: x.rarity, reverse=True):
+            if files.currsize >= files.maxsize:
+                break
+            if not ball.enabled:
+                continue
+            path = find_wild_card(self.media_path + ball.wild_card)
+            try:
+                # skip the files that don't fit before reading them
+                if files.currsize + os.stat(path).st_size > files.maxsize:
+                    continue
+                entry = self._read_file(path)
+            except OSError:
+                log.warning("Cannot read the wild card of %s", ball.country, exc_info=True)
+                continue
+            try:
+                files[ball.wild_card] = entry
+            except ValueError:  # the file grew since stat
+                continue
+        with self.lock:
+            self.files = files
+        log.debug("Loaded %d wild cards in memory (%d KiB)", len(files), files.currsize // 1024)
@@ -17,6 +17,102 @@ caught_balls = Counter(
     "caught_cb", "Caught countryballs", ["country", "special", "guild_size", "spawn_algo"]
 )
 
+card_cache_hits = Counter("card_render_cache_hits", "Rendered cards served from cache", ["tier"])
+card_cache_misses = Counter("card_render_cache_misses", "Rendered cards missing from cache")
+card_cache_evictions = Counter(
+    "card_render_cache_evictions", "Rendered cards evicted from cache", ["tier"]
+)
+card_render_queue_depth = Histogram(
+    "card_render_queue_depth",
+    "Number of cards waiting or being rendered when a new card is submitted",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, float("inf")),
+)
+card_render_time = Histogram(
+    "card_render_time", "Time spent rendering and encoding a card in the pool", ["mode"]
+)
+catalog_invalidation_lag = Histogram(
+    "catalog_invalidation_lag",
+    "Seconds between a catalog change in the admin panel and its application by the bot",
+    ["model"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, float("inf")),
+)
+catalog_resyncs = Counter("catalog_resyncs", "Full reloads of the catalog by the listener")
+spawn_upload_bytes = Histogram(
+    "spawn_upload_bytes",
+    "Size of the image uploaded when spawning",
+    ["source"],
+    buckets=(2**16, 2**17, 2**18, 2**19, 2**20, 2**21, 2**22, 2**23, float("inf")),
+)
+
+# the manager label tells apart the spawn managers of experiments, "default" otherwise
+spawn_cooldowns = Gauge("spawn_cooldowns", "Spawn cooldowns kept in memory", ["manager", "state"])
+spawn_cooldowns_bytes = Gauge(
+    "spawn_cooldowns_bytes",
+    "Approximate memory used by the spawn cooldowns",
+    ["manager", "state"],
+)
+spawn_cooldowns_snapshot_time = Histogram(
+    "spawn_cooldowns_snapshot_time",
+    "Time spent saving or restoring the spawn cooldowns",
+    ["operation"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, float("inf")),
+)
+spawn_cooldowns_snapshot_bytes = Gauge(
+    "spawn_cooldowns_snapshot_bytes",
+    "Size of the last snapshot of the spawn cooldowns",
+    ["manager"],
+)
+spawn_queue_depth = Gauge("spawn_queue_depth", "Number of spawns waiting to be sent")
+spawn_queue_latency = Histogram(
+    "spawn_queue_latency",
+    "Seconds between the decision to spawn and the sending of the spawn message",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, float("inf")),
+)
+spawn_dispatch_results = Counter(
+    "spawn_dispatch_results", "Outcome of the spawns submitted to the queue", ["result"]
+)
+spawn_dispatch_lost = Counter(
+    "spawn_dispatch_lost",
+    "Spawns decided by the spawn manager but never sent, merged with another or dropped",
+    ["algo", "reason"],
+)
+spawn_send_retries = Counter(
+    "spawn_send_retries", "Spawn messages sent again after a rate limit or server error"
+)
+spawn_experiment_guilds = Gauge(
+    "spawn_experiment_guilds",
+    "Guilds assigned to each arm of the spawn experiment",
+    ["experiment", "arm"],
+)
+spawn_experiment_spawns = Counter(
+    "spawn_experiment_spawns",
+    "Spawns decided by each arm of the spawn experiment",
+    ["experiment", "arm"],
+)
+spawn_experiment_decision_time = Histogram(
+    "spawn_experiment_decision_time",
+    "Time taken by each arm of the spawn experiment to handle a message",
+    ["experiment", "arm"],
+    buckets=(
+        0.00001,
+        0.000025,
+        0.00005,
+        0.0001,
+        0.00025,
+        0.0005,
+        0.001,
+        0.005,
+        0.01,
+        float("inf"),
+    ),
+)
+guild_config_cache_entries = Gauge(
+    "guild_config_cache_entries", "Guilds with spawns enabled loaded in cache", ["shard"]
+)
+guild_config_cache_load_time = Gauge(
+    "guild_config_cache_load_time", "Seconds taken by the last load of the guild config cache"
+)
+
 
 class PrometheusServer:
     """
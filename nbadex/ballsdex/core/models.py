@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from enum import IntEnum
 from io import BytesIO
@@ -12,7 +11,7 @@ from tortoise import exceptions, fields, manager, models, signals, timezone, val
 from tortoise.contrib.postgres.indexes import PostgreSQLIndex
 from tortoise.expressions import Q
 
-from ballsdex.core.image_generator.image_gen import draw_card
+from ballsdex.core.image_generator.image_gen import EncoderOptions, draw_card
 from ballsdex.settings import settings
 
 if TYPE_CHECKING:
@@ -351,7 +350,11 @@ class BallInstance(models.Model):
         return buffer
 
     async def prepare_for_message(
-        self, interaction: discord.Interaction["BallsDexBot"]
+        self,
+        interaction: discord.Interaction["BallsDexBot"],
+        *,
+        full_size: bool = True,
+        thumbnail: bool = False,
     ) -> Tuple[str, discord.File, discord.ui.View]:
         # message content
         trade_content = ""
@@ -389,11 +392,13 @@ class BallInstance(models.Model):
         )
 
         # draw image
-        with ThreadPoolExecutor() as pool:
-            buffer = await interaction.client.loop.run_in_executor(pool, self.draw_card)
+        buffer = await interaction.client.render_pool.render(
+            self, full_size=full_size, thumbnail=thumbnail
+        )
+        extension = EncoderOptions.from_settings().extension
 
         view = discord.ui.View()
-        return content, discord.File(buffer, "card.webp"), view
+        return content, discord.File(buffer, f"card.{extension}"), view
 
     async def lock_for_trade(self):
         self.locked = timezone.now()
@@ -0,0 +1,87 @@
+import unicodedata
+from typing import TYPE_CHECKING, Iterable
+
+from ballsdex.settings import settings
+
+if TYPE_CHECKING:
+    from ballsdex.core.models import Ball
+
+# characters substituted by mobile keyboards, and invisible characters
+TRANSLATION_TABLE = str.maketrans(
+    {
+        "\u2018": "'",
+        "\u2019": "'",
+        "\u201b": "'",
+        "\u2032": "'",
+        "`": "'",
+        "\u201c": '"',
+        "\u201d": '"',
+        "\u201f": '"',
+        "\u2033": '"',
+        "\u2010": "-",
+        "\u2011": "-",
+        "\u2012": "-",
+        "\u2013": "-",
+        "\u2014": "-",
+        "\u200b": None,
+        "\u200c": None,
+        "\u200d": None,
+        "\u2060": None,
+        "\ufeff": None,
+    }
+)
+
+
+def normalize_name(text: str) -> str:
+    """
+    Normalize a name or a guess for comparison: compatibility characters (fullwidth letters,
+    ligatures...) are replaced, case and quote styles are ignored, and blanks are collapsed.
+    Accents are also removed if `settings.catch_fold_accents` is enabled.
+    """
+    text = unicodedata.normalize("NFKC", text).translate(TRANSLATION_TABLE).casefold()
+    if settings.catch_fold_accents:
+        text = "".join(
+            x for x in unicodedata.normalize("NFKD", text) if not unicodedata.combining(x)
+        )
+    return " ".join(text.split())
+
+
+def ball_names(ball: "Ball") -> frozenset[str]:
+    """
+    Return the normalized names of a ball: its name, catch names and translations.
+    """
+    names = {ball.country}
+    for field in (ball.catch_names, ball.translations):
+        if field:
+            names.update(field.split(";"))
+    return frozenset(filter(None, map(normalize_name, names)))
+
+
+class CatchNameIndex:
+    """
+    Normalized names accepted for catching each ball, indexed by primary key.
+
+    Rebuild it with `build` whenever the cached balls change.
+    """
+
+    def __init__(self):
+        self.names: dict[int, frozenset[str]] = {}
+        # all the names of a ball on separate lines, for substring search
+        self.search_text: dict[int, str] = {}
+
+    def build(self, balls: Iterable["Ball"]):
+        names = {ball.pk: ball_names(ball) for ball in balls}
+        self.names = names
+        self.search_text = {pk: "\n".join(sorted(x)) for pk, x in names.items()}
+
+    def accepts(self, ball: "Ball", guess: str) -> bool:
+        """
+        Check if a guess matches one of the names of a ball.
+        """
+        names = self.names.get(ball.pk)
+        if names is None:
+            names = ball_names(ball)
+        return normalize_name(guess) in names
+
+
+catch_name_index = CatchNameIndex()
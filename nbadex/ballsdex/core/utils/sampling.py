@@ -0,0 +1,70 @@
+import random
+from typing import Iterable
+
+
+class AliasSampler[T]:
+    """
+    Weighted random sampling in constant time, using Vose's alias method.
+
+    Building the table is linear in the number of items, do it once when the population
+    changes instead of passing the weights to `random.choices` for each draw. Items with a
+    weight of 0 or less are never picked.
+
+    Parameters
+    ----------
+    items: Iterable[tuple[T, float]]
+        The population, as pairs of item and weight. Weights don't need to sum to 1.
+    """
+
+    __slots__ = ("items", "probabilities", "aliases")
+
+    def __init__(self, items: Iterable[tuple[T, float]]):
+        population = [(item, weight) for item, weight in items if weight > 0]
+        self.items: list[T] = [item for item, _ in population]
+        size = len(population)
+        # probability of keeping the item of each column, otherwise its alias is picked
+        self.probabilities: list[float] = [1.0] * size
+        self.aliases: list[int] = list(range(size))
+        if not size:
+            return
+
+        total = sum(weight for _, weight in population)
+        scaled = [weight * size / total for _, weight in population]
+        small = [i for i, x in enumerate(scaled) if x < 1]
+        large = [i for i, x in enumerate(scaled) if x >= 1]
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            self.probabilities[less] = scaled[less]
+            self.aliases[less] = more
+            scaled[more] += scaled[less] - 1
+            (small if scaled[more] < 1 else large).append(more)
+        # the remaining columns are full, up to rounding errors
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def sample(self, rng: random.Random | None = None) -> T:
+        """
+        Pick a random item, proportionally to its weight.
+
+        Parameters
+        ----------
+        rng: random.Random | None
+            Source of randomness, the global generator of the `random` module by default.
+
+        Raises
+        ------
+        IndexError
+            The population is empty.
+        """
+        if not self.items:
+            raise IndexError("Cannot sample from an empty population")
+        # the integer part picks the column, the fractional part decides between the item
+        # and its alias
+        x = (rng or random).random() * len(self.items)
+        # rounding can reach the size for very large populations
+        column = min(int(x), len(self.items) - 1)
+        if x - column < self.probabilities[column]:
+            return self.items[column]
+        return self.items[self.aliases[column]]
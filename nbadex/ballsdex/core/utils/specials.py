@@ -0,0 +1,87 @@
+import bisect
+import random
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Iterable
+
+from tortoise.timezone import now as tortoise_now
+
+from ballsdex.core.utils.sampling import AliasSampler
+
+if TYPE_CHECKING:
+    from ballsdex.core.models import Special
+
+
+class SpecialSchedule:
+    """
+    Index of the special events by date, giving the events active at a given time.
+
+    The dates where the active population changes are kept sorted. The population and its
+    sampler are computed once and reused until the next of these dates, instead of checking
+    every event on each catch.
+
+    Rebuild it with `build` whenever the cached specials change.
+    """
+
+    def __init__(self):
+        self.specials: list["Special"] = []
+        self.boundaries: list[datetime] = []
+        self.valid_from: datetime | None = None
+        self.valid_until: datetime | None = None
+        self.population: list["Special"] = []
+        self.sampler: AliasSampler["Special | None"] = AliasSampler([])
+
+    def build(self, specials: Iterable["Special"]):
+        self.specials = list(specials)
+        boundaries: set[datetime] = set()
+        for special in self.specials:
+            if special.start_date:
+                boundaries.add(special.start_date)
+            if special.end_date:
+                # the end date is included, the event stops right after
+                boundaries.add(special.end_date + timedelta(microseconds=1))
+        self.boundaries = sorted(boundaries)
+        self.valid_from = self.valid_until = None
+
+    def _refresh(self, now: datetime):
+        if (
+            self.valid_from is not None
+            and self.valid_from <= now
+            and (self.valid_until is None or now < self.valid_until)
+        ):
+            return
+        i = bisect.bisect_right(self.boundaries, now)
+        self.valid_from = (
+            self.boundaries[i - 1] if i > 0 else datetime.min.replace(tzinfo=now.tzinfo)
+        )
+        self.valid_until = self.boundaries[i] if i < len(self.boundaries) else None
+        self.population = [
+            x
+            for x in self.specials
+            # null start/end dates are unbounded
+            if (x.start_date is None or x.start_date <= now)
+            and (x.end_date is None or now <= x.end_date)
+        ]
+        # None represents the common countryball, with the remaining probability
+        common_weight = max(1 - sum(x.rarity for x in self.population), 0)
+        self.sampler = AliasSampler(
+            [*((x, x.rarity) for x in self.population), (None, common_weight)]
+        )
+
+    def active(self, now: datetime | None = None) -> list["Special"]:
+        """
+        Return the special events active at the given time, now by default.
+        """
+        self._refresh(now or tortoise_now())
+        return self.population
+
+    def sample(
+        self, now: datetime | None = None, rng: random.Random | None = None
+    ) -> "Special | None":
+        """
+        Pick one of the active special events according to their rarity, or `None` for a
+        common countryball.
+        """
+        self._refresh(now or tortoise_now())
+        if not self.sampler:
+            return None
+        return self.sampler.sample(rng)
@@ -22,6 +22,7 @@ from ballsdex.core.models import (
     economies,
     regimes,
 )
+from ballsdex.core.utils.catch_names import ball_names, catch_name_index, normalize_name
 from ballsdex.settings import settings
 
 if TYPE_CHECKING:
@@ -238,22 +239,32 @@ class TTLModelTransformer(ModelTransformer[T]):
         """
         return await self.model.all()
 
+    def search_key(self, model: T) -> str:
+        """
+        Return the string in which the search value is looked for, lowered.
+        """
+        return self.key(model).lower()
+
+    def normalize_search(self, value: str) -> str:
+        return value.lower()
+
     async def maybe_refresh(self):
         t = time.time()
         if t - self.last_refresh > self.ttl:
             self.items = {x.pk: x for x in await self.load_items()}
             self.last_refresh = t
-            self.search_map = {x: self.key(x).lower() for x in self.items.values()}
+            self.search_map = {x: self.search_key(x) for x in self.items.values()}
 
     async def get_options(
         self, interaction: Interaction["BallsDexBot"], value: str
     ) -> list[app_commands.Choice[str]]:
         await self.maybe_refresh()
 
+        value = self.normalize_search(value)
         i = 0
         choices: list[app_commands.Choice] = []
         for item in self.items.values():
-            if value.lower() in self.search_map[item]:
+            if value in self.search_map[item]:
                 choices.append(app_commands.Choice(name=self.key(item), value=str(item.pk)))
                 i += 1
                 if i == 25:
@@ -268,6 +279,15 @@ class BallTransformer(TTLModelTransformer[Ball]):
     def key(self, model: Ball) -> str:
         return model.country
 
+    def search_key(self, model: Ball) -> str:
+        # also matches the catch names and translations
+        if (text := catch_name_index.search_text.get(model.pk)) is None:
+            text = "\n".join(ball_names(model))
+        return text
+
+    def normalize_search(self, value: str) -> str:
+        return normalize_name(value)
+
     async def load_items(self) -> Iterable[Ball]:
         return balls.values()
 
@@ -220,7 +220,9 @@ class Balls(commands.GroupCog, group_name=settings.players_group_cog_name):
         if reverse:
             countryballs.reverse()
 
-        paginator = CountryballsViewer(interaction, countryballs)
+        paginator = CountryballsViewer(
+            interaction, countryballs, thumbnail=settings.card_thumbnails
+        )
         if user_obj == interaction.user:
             await paginator.start()
         else:
@@ -446,7 +448,9 @@ class Balls(commands.GroupCog, group_name=settings.players_group_cog_name):
             )
             return
 
-        content, file, view = await countryball.prepare_for_message(interaction)
+        content, file, view = await countryball.prepare_for_message(
+            interaction, full_size=False, thumbnail=settings.card_thumbnails
+        )
         if user is not None and user.id != interaction.user.id:
             content = (
                 f"You are viewing {user.display_name}'s last caught {settings.collectible_name}.\n"
@@ -1171,31 +1175,15 @@ class Balls(commands.GroupCog, group_name=settings.players_group_cog_name):
                     )
                     return
             
-            log.info("Getting all balls")
-            
-            # Get all enabled balls with their rarities
-            all_balls = await Ball.all().filter(enabled=True)
-            
-            if not all_balls:
+            # Enabled balls with a positive rarity, weighted by rarity
+            if not self.bot.ball_sampler:
                 await interaction.followup.send(
                     "No NBAs available to claim at the moment.",
                     ephemeral=True,
                 )
                 return
             
-            # Get balls with positive rarity for weighted selection
-            spawnable_balls = [b for b in all_balls if b.rarity > 0]
-            
-            if not spawnable_balls:
-                await interaction.followup.send(
-                    "No spawnable NBAs available to claim.",
-                    ephemeral=True,
-                )
-                return
-            
-            # Weighted random selection based on rarity
-            rarities = [b.rarity for b in spawnable_balls]
-            selected_ball = random.choices(spawnable_balls, weights=rarities, k=1)[0]
+            selected_ball = self.bot.ball_sampler.sample()
             
             # Generate random stats
             attack_bonus = random.randint(
@@ -1224,7 +1212,9 @@ class Balls(commands.GroupCog, group_name=settings.players_group_cog_name):
             log.info("Preparing message")
             
             # Generate and send the card image with congratulations
-            content, file, view = await ball_instance.prepare_for_message(interaction)
+            content, file, view = await ball_instance.prepare_for_message(
+                interaction, full_size=False
+            )
             
             log.info("Sending response")
             
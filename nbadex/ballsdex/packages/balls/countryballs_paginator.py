@@ -84,10 +84,21 @@ class CountryballsSelector(Pages):
 
 
 class CountryballsViewer(CountryballsSelector):
+    def __init__(
+        self,
+        interaction: discord.Interaction["BallsDexBot"],
+        balls: list[int],
+        thumbnail: bool = False,
+    ):
+        super().__init__(interaction, balls)
+        self.thumbnail = thumbnail
+
     async def ball_selected(
         self, interaction: discord.Interaction["BallsDexBot"], ball_instance: BallInstance
     ):
-        content, file, view = await ball_instance.prepare_for_message(interaction)
+        content, file, view = await ball_instance.prepare_for_message(
+            interaction, full_size=False, thumbnail=self.thumbnail
+        )
         await interaction.followup.send(content=content, file=file, view=view)
         file.close()
 
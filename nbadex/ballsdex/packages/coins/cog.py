@@ -10,6 +10,7 @@ from tortoise import timezone
 from tortoise.expressions import Q
 from tortoise.transactions import in_transaction
 
+from ballsdex.core.image_generator.image_gen import EncoderOptions
 from ballsdex.core.models import (
     Ball,
     BallInstance,
@@ -32,6 +33,9 @@ log = logging.getLogger("ballsdex.packages.coins")
 
 _active_operations: Set[int] = set()
 
+# maximum number of cards shown in the image of pack results
+MAX_CONTACT_SHEET_CARDS = 30
+
 
 class ConfirmView(discord.ui.View):
     def __init__(self, user: discord.User | discord.Member, timeout: float = 60):
@@ -1092,6 +1096,23 @@ class Packs(commands.GroupCog, group_name="pack"):
                     color=discord.Color.gold()
                 )
             
-            await interaction.followup.send(embed=embed)
+            try:
+                sheet = await self.bot.render_pool.render_contact_sheet(
+                    results[:MAX_CONTACT_SHEET_CARDS]
+                )
+            except Exception:
+                log.error("Failed to render pack results", exc_info=True)
+                await interaction.followup.send(embed=embed)
+            else:
+                if len(results) > MAX_CONTACT_SHEET_CARDS:
+                    embed.set_footer(
+                        text=f"Showing the first {MAX_CONTACT_SHEET_CARDS} cards "
+                        f"out of {len(results)}"
+                    )
+                filename = f"pack.{EncoderOptions.from_settings().extension}"
+                embed.set_image(url=f"attachment://{filename}")
+                await interaction.followup.send(
+                    embed=embed, file=discord.File(sheet, filename=filename)
+                )
         finally:
             _active_operations.discard(interaction.user.id)
@@ -1,12 +1,11 @@
 from typing import TYPE_CHECKING, Literal
 
+from ballsdex.packages.countryballs.experiment import DEFAULT, Arm, ExperimentSpawner
 from ballsdex.packages.countryballs.spawn import BaseSpawnManager
 
 if TYPE_CHECKING:
     import discord
 
-    from ballsdex.core.bot import BallsDexBot
-
 # It is a good idea to call importlib.reload on your custom module to make "b.reload countryballs"
 # also reload the spawn manager. Otherwise, you'll be forced to fully restart to apply changes
 #
@@ -17,7 +16,7 @@ if TYPE_CHECKING:
 # manager_class_b = yourpackage.SpawnManager
 
 
-class ABSpawner(BaseSpawnManager):
+class ABSpawner(ExperimentSpawner):
     """
     This is an unused class made available for A/B testing your spawn algorithms.
     https://en.wikipedia.org/wiki/A/B_testing
@@ -27,6 +26,9 @@ class ABSpawner(BaseSpawnManager):
 
     Each guild will be assigned to one of your spawn manager defined below, using the configured
     percentage.
+
+    This is kept for existing subclasses, `ExperimentSpawner` supports more than two managers,
+    ramping and holdouts configured in `spawn-experiment`, without subclassing.
     """
 
     # chance of using algorithm a instead of b
@@ -37,52 +39,42 @@ class ABSpawner(BaseSpawnManager):
     manager_class_a: type[BaseSpawnManager]  # = SpawnManager
     manager_class_b: type[BaseSpawnManager]  # = YourCustomManager
 
-    def __init__(self, bot: "BallsDexBot"):
-        self.manager_a = self.manager_class_a(bot)
-        self.manager_b = self.manager_class_b(bot)
+    def create_arms(self) -> tuple[BaseSpawnManager, list[Arm]]:
+        self.name = "ab"
+        name_a = self.manager_class_a.__name__
+        name_b = self.manager_class_b.__name__
+        if name_a == name_b:
+            name_a, name_b = "A", "B"
+        # manager A keeps the snapshot file used before ABSpawner was an experiment
+        self.manager_a = self.create_manager(DEFAULT, self.manager_class_a)
+        self.manager_b = self.create_manager(name_b, self.manager_class_b)
+        return self.manager_a, [
+            Arm(name_a, self.manager_a, self.percentage),
+            Arm(name_b, self.manager_b, 100 - self.percentage),
+        ]
 
-    def get_manager(self, guild: "discord.Guild") -> BaseSpawnManager:
-        """
-        Return manager A or B for the guild. This will consistently return the same
-        manager accross restarts, unless the percentage is changed.
-        """
+    def assign(self, guild_id: int) -> str:
         # For fast and accurate repartition of guilds, random is not used, instead we rely on
         # their ID modulo 100 and see where it lands.
         # In a Discord ID, bits 22 to 64 correspond to the timestamp, so we shift the ID 22 bits
         # to the right and use the least significant bits (miliseconds) for our operation.
         # Without bit-shifting, the least significant bits wouldn't have a proper distribution
         # https://discord.com/developers/docs/reference#snowflakes
-        if (guild.id >> 22) % 100 < self.percentage:
-            return self.manager_a
+        if (guild_id >> 22) % 100 < self.percentage:
+            return self.arms[0].name
         else:
-            return self.manager_b
+            return self.arms[1].name
 
-    async def handle_message(self, message: "discord.Message") -> bool | tuple[Literal[True], str]:
-        assert message.guild
-        manager = self.get_manager(message.guild)
-        result = await manager.handle_message(message)
-        if result is False:
-            return False
+    def algo(self, arm: str, result: bool | tuple[Literal[True], str]) -> str:
+        # keep the labels of the catches made before ABSpawner was an experiment
+        name = self.managers[arm].__class__.__name__
         if isinstance(result, tuple):
-            result, msg = result
-            msg += f"-{manager.__class__.__name__}"
-        else:
-            msg = manager.__class__.__name__
-        return result, msg
+            return f"{result[1]}-{name}"
+        return name
 
-    async def admin_explain(
-        self, interaction: "discord.Interaction[BallsDexBot]", guild: "discord.Guild"
-    ):
-        manager = self.get_manager(guild)
-        await manager.admin_explain(interaction, guild)
-        if manager == self.manager_a:
-            a_or_b = "A"
-            percentage = self.percentage
-        else:
-            a_or_b = "B"
-            percentage = 100 - self.percentage
-        await interaction.followup.send(
-            f"[AB Spawner] Server {guild.name} ({guild.id}) has been assigned to spawn manager "
-            f"{a_or_b} (`{manager.__class__.__name__}`) ({percentage}% chance)",
-            ephemeral=True,
-        )
+    def get_manager(self, guild: "discord.Guild") -> BaseSpawnManager:
+        """
+        Return manager A or B for the guild. This will consistently return the same
+        manager accross restarts, unless the percentage is changed.
+        """
+        return self.managers[self.get_arm(guild.id)]
@@ -1,21 +1,33 @@
+import asyncio
 import importlib
 import logging
-from typing import TYPE_CHECKING, cast
+import time
+from collections import Counter
+from typing import TYPE_CHECKING, AsyncIterator, cast
 
 import discord
 from discord.ext import commands
+from tortoise import Tortoise
 from tortoise.exceptions import DoesNotExist
 
+from ballsdex.core.metrics import guild_config_cache_entries, guild_config_cache_load_time
 from ballsdex.core.models import GuildConfig
 from ballsdex.packages.countryballs.countryball import BallSpawnView
+from ballsdex.packages.countryballs.dispatch import SpawnDispatcher
 from ballsdex.packages.countryballs.spawn import BaseSpawnManager
 from ballsdex.settings import settings
 
 if TYPE_CHECKING:
+    import asyncpg.connection
+    from tortoise.backends.asyncpg.client import AsyncpgDBClient
+
     from ballsdex.core.bot import BallsDexBot
 
 log = logging.getLogger("ballsdex.packages.countryballs")
 
+# number of rows fetched at once when loading the cache
+CACHE_PREFETCH = 1000
+
 
 class CountryBallsSpawner(commands.Cog):
     spawn_manager: BaseSpawnManager
@@ -23,6 +35,8 @@ class CountryBallsSpawner(commands.Cog):
     def __init__(self, bot: "BallsDexBot"):
         self.bot = bot
         self.cache: dict[int, int] = {}
+        # shards whose guilds were all loaded by `load_cache`, None if all shards were loaded
+        self.loaded_shards: set[int] | None = set()
         self.countryball_cls = BallSpawnView
 
         module_path, class_name = settings.spawn_manager.rsplit(".", 1)
@@ -31,16 +45,93 @@ class CountryBallsSpawner(commands.Cog):
         importlib.reload(module)
         spawn_manager = getattr(module, class_name)
         self.spawn_manager = spawn_manager(bot)
+        self.save_task: asyncio.Task[None] | None = None
+        self.dispatcher = SpawnDispatcher(self)
+
+    async def cog_load(self):
+        await self.spawn_manager.load_state()
+        self.save_task = asyncio.create_task(self.save_state_periodically())
+        self.dispatcher.start()
+
+    async def cog_unload(self):
+        self.dispatcher.stop()
+        if self.save_task:
+            self.save_task.cancel()
+        try:
+            await self.spawn_manager.save_state()
+        except Exception:
+            log.exception("Failed to save the spawn manager state")
+
+    async def save_state_periodically(self):
+        while True:
+            await asyncio.sleep(settings.spawn_cooldowns_snapshot_interval)
+            try:
+                await self.spawn_manager.save_state()
+            except Exception:
+                log.exception("Failed to save the spawn manager state")
+
+    async def iter_spawn_channels(
+        self, shard_ids: list[int] | None = None
+    ) -> AsyncIterator[tuple[int, int]]:
+        """
+        Stream the guild IDs and spawn channels of the guilds with spawns enabled, optionally
+        restricted to the given shards, without loading the whole table in memory.
+        """
+        query = (
+            f'SELECT guild_id, spawn_channel FROM "{GuildConfig._meta.db_table}" '
+            "WHERE enabled AND spawn_channel IS NOT NULL"
+        )
+        args: list = []
+        if shard_ids is not None:
+            # https://discord.com/developers/docs/topics/gateway#sharding-sharding-formula
+            query += " AND (guild_id >> 22) % $1 = ANY($2::bigint[])"
+            args = [self.bot.shard_count, shard_ids]
+        client = cast("AsyncpgDBClient", Tortoise.get_connection("default"))
+        conn: "asyncpg.connection.Connection"
+        async with client.acquire_connection() as conn:
+            # cursors only exist within a transaction
+            async with conn.transaction():
+                async for record in conn.cursor(query, *args, prefetch=CACHE_PREFETCH):
+                    yield record["guild_id"], record["spawn_channel"]
 
     async def load_cache(self):
-        i = 0
-        async for config in GuildConfig.filter(enabled=True, spawn_channel__isnull=False).only(
-            "guild_id", "spawn_channel"
-        ):
-            self.cache[config.guild_id] = config.spawn_channel
-            i += 1
+        start = time.perf_counter()
+        # shards of this process, all of them if not configured
+        shard_ids = list(self.bot.shard_ids) if self.bot.shard_ids is not None else None
+        shard_count = self.bot.shard_count
+        entries: Counter[str] = Counter()
+        async for guild_id, spawn_channel in self.iter_spawn_channels(shard_ids):
+            self.cache[guild_id] = spawn_channel
+            # the shard count is only known before connecting if configured
+            entries[str((guild_id >> 22) % shard_count) if shard_count else "all"] += 1
+        self.loaded_shards = set(shard_ids) if shard_ids is not None else None
+        load_time = time.perf_counter() - start
+
+        for shard, count in entries.items():
+            guild_config_cache_entries.labels(shard=shard).set(count)
+        guild_config_cache_load_time.set(load_time)
+        i = entries.total()
         grammar = "" if i == 1 else "s"
-        log.info(f"Loaded {i} guild{grammar} in cache.")
+        log.info(f"Loaded {i} guild{grammar} in cache in {load_time:.2f}s.")
+        if len(entries) > 1:
+            log.debug(
+                "Guilds loaded per shard: "
+                + ", ".join(
+                    f"{k}: {v}" for k, v in sorted(entries.items(), key=lambda x: int(x[0]))
+                )
+            )
+
+    async def load_guild(self, guild: discord.Guild):
+        """
+        Load the spawn channel of a single guild, for guilds not covered by `load_cache`.
+        """
+        config = (
+            await GuildConfig.filter(guild_id=guild.id, enabled=True, spawn_channel__isnull=False)
+            .only("guild_id", "spawn_channel")
+            .first()
+        )
+        if config:
+            self.cache[guild.id] = cast(int, config.spawn_channel)
 
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
@@ -67,10 +158,9 @@ class CountryBallsSpawner(commands.Cog):
         if not channel:
             log.warning(f"Lost channel {self.cache[guild.id]} for guild {guild.name}.")
             del self.cache[guild.id]
+            self.spawn_manager.forget(guild.id)
             return
-        ball = await BallSpawnView.get_random(self.bot)
-        ball.algo = algo
-        await ball.spawn(cast(discord.TextChannel, channel))
+        self.dispatcher.submit(cast(discord.TextChannel, channel), algo)
 
     @commands.Cog.listener()
     async def on_ballsdex_settings_change(
@@ -94,5 +184,23 @@ class CountryBallsSpawner(commands.Cog):
         else:
             if enabled is False:
                 del self.cache[guild.id]
+                self.spawn_manager.forget(guild.id)
             elif channel:
                 self.cache[guild.id] = channel.id
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild: discord.Guild):
+        await self.load_guild(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_available(self, guild: discord.Guild):
+        if guild.id in self.cache:
+            return
+        if self.loaded_shards is None or guild.shard_id in self.loaded_shards:
+            return
+        await self.load_guild(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.cache.pop(guild.id, None)
+        self.spawn_manager.forget(guild.id)
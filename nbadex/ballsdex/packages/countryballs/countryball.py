@@ -1,28 +1,19 @@
 from __future__ import annotations
 
+import asyncio
+import io
 import logging
 import math
 import random
 import string
-from datetime import datetime
 from typing import TYPE_CHECKING
 
 import discord
 from discord.ui import Button, Modal, TextInput, View, button
-from tortoise.timezone import get_default_timezone
-from tortoise.timezone import now as tortoise_now
-
-from ballsdex.core.metrics import caught_balls
-from ballsdex.core.models import (
-    Ball,
-    BallInstance,
-    Player,
-    Special,
-    Trade,
-    TradeObject,
-    balls,
-    specials,
-)
+
+from ballsdex.core.metrics import caught_balls, spawn_send_retries, spawn_upload_bytes
+from ballsdex.core.models import Ball, BallInstance, Player, Special, Trade, TradeObject
+from ballsdex.core.utils.catch_names import catch_name_index
 from ballsdex.core.utils.utils import can_mention
 from ballsdex.settings import settings
 
@@ -198,44 +189,18 @@ class BallSpawnView(View):
         """
         Get a new instance with a random countryball. Rarity values are taken into account.
         """
-        countryballs = list(filter(lambda m: m.enabled, balls.values()))
-        if not countryballs:
+        if not bot.ball_sampler:
             raise RuntimeError("No ball to spawn")
-        rarities = [x.rarity for x in countryballs]
-        cb = random.choices(population=countryballs, weights=rarities, k=1)[0]
-        return cls(bot, cb)
+        return cls(bot, bot.ball_sampler.sample())
 
     @property
     def name(self):
         return self.model.country
 
     def get_random_special(self) -> Special | None:
-        population = [
-            x
-            for x in specials.values()
-            # handle null start/end dates with infinity times
-            if (x.start_date or datetime.min.replace(tzinfo=get_default_timezone()))
-            <= tortoise_now()
-            <= (x.end_date or datetime.max.replace(tzinfo=get_default_timezone()))
-        ]
-
-        if not population:
-            return None
-
-        common_weight: float = 1 - sum(x.rarity for x in population)
-
-        if common_weight < 0:
-            common_weight = 0
+        return self.bot.special_schedule.sample()
 
-        weights = [x.rarity for x in population] + [common_weight]
-        # None is added representing the common countryball
-        special: Special | None = random.choices(
-            population=population + [None], weights=weights, k=1
-        )[0]
-
-        return special
-
-    async def spawn(self, channel: discord.TextChannel) -> bool:
+    async def spawn(self, channel: discord.TextChannel, *, attempts: int = 1) -> bool:
         """
         Spawn a countryball in a channel.
 
@@ -244,6 +209,9 @@ class BallSpawnView(View):
         channel: discord.TextChannel
             The channel where to spawn the countryball. Must have permission to send messages
             and upload files as a bot (not through interactions).
+        attempts: int
+            Number of tries to send the message if Discord answers with a rate limit or a
+            server error, waiting longer after each failure.
 
         Returns
         -------
@@ -256,12 +224,17 @@ class BallSpawnView(View):
             source = string.ascii_uppercase + string.ascii_lowercase + string.ascii_letters
             return "".join(random.choices(source, k=15))
 
-        extension = self.model.wild_card.split(".")[-1]
-        file_location = "./admin_panel/media/" + self.model.wild_card
-        file_name = f"nt_{generate_random_name()}.{extension}"
         try:
             permissions = channel.permissions_for(channel.guild.me)
             if permissions.attach_files and permissions.send_messages:
+                # memory hits are served without leaving the event loop
+                if entry := self.bot.wild_card_cache.get_cached(self.model.wild_card):
+                    (extension, data), cached = entry, True
+                else:
+                    (extension, data), cached = await asyncio.to_thread(
+                        self.bot.wild_card_cache.get, self.model.wild_card
+                    )
+                file_name = f"nt_{generate_random_name()}.{extension}"
                 spawn_message = random.choice(settings.spawn_messages).format(
                     collectible=settings.collectible_name,
                     ball=self.name,
@@ -269,11 +242,20 @@ class BallSpawnView(View):
                     emoji=self.bot.get_emoji(self.model.emoji_id),
                 )
 
-                self.message = await channel.send(
-                    spawn_message,
-                    view=self,
-                    file=discord.File(file_location, filename=file_name),
-                )
+                for attempt in range(attempts):
+                    try:
+                        self.message = await channel.send(
+                            spawn_message,
+                            view=self,
+                            file=discord.File(io.BytesIO(data), filename=file_name),
+                        )
+                        break
+                    except discord.HTTPException as e:
+                        if attempt + 1 == attempts or (e.status != 429 and e.status < 500):
+                            raise
+                        spawn_send_retries.inc()
+                        await asyncio.sleep(2**attempt + random.random())
+                spawn_upload_bytes.labels(source="memory" if cached else "disk").observe(len(data))
                 return True
             else:
                 log.warning("Missing permission to spawn ball in channel %s.", channel)
@@ -290,25 +272,15 @@ class BallSpawnView(View):
         Parameters
         ----------
         text: str
-            The text entered by the user. It will be lowered and stripped of enclosing blank
-            characters.
+            The text entered by the user. It is normalized with `normalize_name` and compared
+            with the name, catch names and translations of the ball.
 
         Returns
         -------
         bool
             Whether the name matches or not.
         """
-        if self.model.catch_names:
-            possible_names = (self.name.lower(), *self.model.catch_names.split(";"))
-        else:
-            possible_names = (self.name.lower(),)
-        cname = text.lower().strip()
-        # Remove fancy unicode characters like ’ to replace to '
-        cname = cname.replace("\u2019", "'")
-        cname = cname.replace("\u2018", "'")
-        cname = cname.replace("\u201c", '"')
-        cname = cname.replace("\u201d", '"')
-        return cname in possible_names
+        return catch_name_index.accepts(self.model, text)
 
     async def catch_ball(
         self,
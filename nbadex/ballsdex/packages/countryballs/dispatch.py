@@ -0,0 +1,190 @@
+import asyncio
+import heapq
+import logging
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import discord
+
+from ballsdex.core.metrics import (
+    spawn_dispatch_lost,
+    spawn_dispatch_results,
+    spawn_queue_depth,
+    spawn_queue_latency,
+)
+from ballsdex.settings import settings
+
+if TYPE_CHECKING:
+    from ballsdex.packages.countryballs.cog import CountryBallsSpawner
+
+log = logging.getLogger("ballsdex.packages.countryballs")
+
+
+@dataclass(slots=True)
+class SpawnRequest:
+    channel: discord.TextChannel
+    algo: str
+    # monotonic time of the decision to spawn
+    time: float
+
+
+class RateLimiter:
+    """
+    Token bucket allowing `rate` operations per second on average, and bursts of up to `rate`
+    operations.
+    """
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self.tokens = 1
+                self.updated = time.monotonic()
+            self.tokens -= 1
+
+
+class SpawnDispatcher:
+    """
+    Send the spawn messages in the background, so that handling messages never waits for
+    Discord.
+
+    Spawns are queued by channel and sent by a few workers, no faster than
+    `settings.spawn_dispatch_rate` messages per second overall, and with at least
+    `settings.spawn_dispatch_channel_interval` seconds between two spawns in a channel.
+    Channels within their interval are set aside until it elapses, without holding a worker.
+
+    A spawn submitted for a channel that already has one waiting is dropped, as well as spawns
+    submitted while the queue is full. Those are counted in `spawn_dispatch_lost`, since the
+    spawn manager already reset the cooldown of the guild.
+    """
+
+    def __init__(self, cog: "CountryBallsSpawner"):
+        self.cog = cog
+        self.queue: asyncio.Queue[int] = asyncio.Queue(settings.spawn_dispatch_queue_size)
+        # requests waiting to be sent, queued or delayed, by channel ID
+        self.pending: dict[int, SpawnRequest] = {}
+        # monotonic time of the last spawn, by channel ID
+        self.last_spawns: dict[int, float] = {}
+        # (due monotonic time, channel ID) of the requests waiting for their channel interval
+        self.delayed: list[tuple[float, int]] = []
+        self.delayed_changed = asyncio.Event()
+        self.rate_limiter = RateLimiter(settings.spawn_dispatch_rate)
+        self.workers: list[asyncio.Task[None]] = []
+
+    def start(self):
+        self.workers = [
+            asyncio.create_task(self.work(), name=f"spawn-dispatch-{i}")
+            for i in range(settings.spawn_dispatch_workers)
+        ]
+        self.workers.append(
+            asyncio.create_task(self.schedule_delayed(), name="spawn-dispatch-delayed")
+        )
+
+    def stop(self):
+        for worker in self.workers:
+            worker.cancel()
+        self.workers.clear()
+
+    def submit(self, channel: discord.TextChannel, algo: str) -> bool:
+        """
+        Queue a spawn in a channel.
+
+        Returns
+        -------
+        bool
+            Whether the spawn was queued, `False` if it was merged with a spawn already waiting
+            for that channel or if the queue is full.
+        """
+        if channel.id in self.pending:
+            spawn_dispatch_results.labels(result="coalesced").inc()
+            spawn_dispatch_lost.labels(algo=algo, reason="coalesced").inc()
+            log.debug(f"Spawn already waiting in channel {channel.id}, merged with the new one.")
+            return False
+        # delayed requests count too, the queue can then never be full
+        if len(self.pending) >= settings.spawn_dispatch_queue_size:
+            spawn_dispatch_results.labels(result="dropped").inc()
+            spawn_dispatch_lost.labels(algo=algo, reason="dropped").inc()
+            log.warning(f"Spawn queue full, dropped spawn in channel {channel.id}.")
+            return False
+        self.pending[channel.id] = SpawnRequest(channel, algo, time.monotonic())
+        self.queue.put_nowait(channel.id)
+        spawn_queue_depth.set(len(self.pending))
+        return True
+
+    async def work(self):
+        while True:
+            channel_id = await self.queue.get()
+            delayed = False
+            try:
+                if due := self.channel_due(channel_id):
+                    # sent later, the other channels must not wait for this one
+                    heapq.heappush(self.delayed, (due, channel_id))
+                    self.delayed_changed.set()
+                    delayed = True
+                else:
+                    await self.dispatch(self.pending[channel_id])
+            except Exception:
+                spawn_dispatch_results.labels(result="failed").inc()
+                log.exception(f"Failed to spawn in channel {channel_id}")
+            finally:
+                # delayed requests stay pending, new spawns in the channel are merged with them
+                if not delayed:
+                    self.pending.pop(channel_id, None)
+                    spawn_queue_depth.set(len(self.pending))
+                self.queue.task_done()
+
+    def channel_due(self, channel_id: int) -> float | None:
+        """
+        Return the monotonic time at which a spawn can be sent in the channel, or `None` if it
+        can be sent now.
+        """
+        if last_spawn := self.last_spawns.get(channel_id):
+            due = last_spawn + settings.spawn_dispatch_channel_interval
+            if due > time.monotonic():
+                return due
+        return None
+
+    async def schedule_delayed(self):
+        """
+        Put the delayed requests back in the queue once their channel interval elapsed.
+        """
+        while True:
+            self.delayed_changed.clear()
+            timeout = self.delayed[0][0] - time.monotonic() if self.delayed else None
+            if timeout is None or timeout > 0:
+                try:
+                    await asyncio.wait_for(self.delayed_changed.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            _, channel_id = heapq.heappop(self.delayed)
+            self.queue.put_nowait(channel_id)
+
+    async def dispatch(self, request: SpawnRequest):
+        channel_id = request.channel.id
+        await self.rate_limiter.acquire()
+
+        ball = await self.cog.countryball_cls.get_random(self.cog.bot)
+        ball.algo = request.algo
+        spawn_queue_latency.observe(time.monotonic() - request.time)
+        success = await ball.spawn(request.channel, attempts=settings.spawn_dispatch_attempts)
+        spawn_dispatch_results.labels(result="sent" if success else "failed").inc()
+        self.last_spawns[channel_id] = time.monotonic()
+        self.prune_last_spawns()
+
+    def prune_last_spawns(self):
+        # only the spawns within the channel interval matter
+        if len(self.last_spawns) < 1024:
+            return
+        limit = time.monotonic() - settings.spawn_dispatch_channel_interval
+        self.last_spawns = {k: v for k, v in self.last_spawns.items() if v > limit}
@@ -0,0 +1,193 @@
+import asyncio
+import hashlib
+import importlib
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Literal
+
+import discord
+
+from ballsdex.core.metrics import (
+    spawn_experiment_decision_time,
+    spawn_experiment_guilds,
+    spawn_experiment_spawns,
+)
+from ballsdex.packages.countryballs.spawn import BaseSpawnManager, SpawnManager
+from ballsdex.settings import settings
+
+if TYPE_CHECKING:
+    from ballsdex.core.bot import BallsDexBot
+
+# arms of the guilds not enrolled in the experiment, both using the default manager
+DEFAULT = "default"
+HOLDOUT = "holdout"
+
+
+@dataclass(slots=True)
+class Arm:
+    name: str
+    manager: BaseSpawnManager
+    weight: float
+
+
+def load_spawn_manager(path: str) -> type[BaseSpawnManager]:
+    module_path, class_name = path.rsplit(".", 1)
+    return getattr(importlib.import_module(module_path), class_name)
+
+
+class ExperimentSpawner(BaseSpawnManager):
+    """
+    Split the guilds between several spawn managers, configured in `spawn-experiment`, to
+    compare them. Prometheus can then be used to compare the results: the spawns, decision times
+    and guild counts are reported per arm, and catches are labelled with the arm in `caught_cb`.
+
+    Guilds are assigned with two stable hashes of their ID and the experiment name:
+
+    - The first one decides if a guild is enrolled. Guilds in the last `holdout` percents are
+      never enrolled, and only the first `ramp` percents are. Increasing the ramp enrolls more
+      guilds without moving the ones already enrolled.
+    - The second one picks the arm of enrolled guilds according to the weights. Changing the
+      weight of an arm reassigns the guilds of this arm and of the following ones.
+
+    Guilds not enrolled use the default manager, and are reported as the "default" or "holdout"
+    arms. The assignment is the same across restarts and shards as long as the configuration
+    does not change.
+    """
+
+    def __init__(self, bot: "BallsDexBot"):
+        super().__init__(bot)
+        self.name = settings.spawn_experiment_name
+        self.default, self.arms = self.create_arms()
+        self.total_weight = sum(x.weight for x in self.arms)
+        self.managers: dict[str, BaseSpawnManager] = {
+            DEFAULT: self.default,
+            HOLDOUT: self.default,
+            **{x.name: x.manager for x in self.arms},
+        }
+        if len(self.managers) != len(self.arms) + 2:
+            raise ValueError(
+                "Spawn experiment arms must have unique names, "
+                f'other than "{DEFAULT}" and "{HOLDOUT}"'
+            )
+        # guild ID -> arm name
+        self.assignments: dict[int, str] = {}
+        # guilds are counted again as they send messages, after a reload too
+        for arm in self.managers:
+            spawn_experiment_guilds.labels(experiment=self.name, arm=arm).set(0)
+        self.decision_time = {
+            x: spawn_experiment_decision_time.labels(experiment=self.name, arm=x)
+            for x in self.managers
+        }
+
+    def create_arms(self) -> tuple[BaseSpawnManager, list[Arm]]:
+        """
+        Return the default manager and the arms of the experiment.
+        """
+        default = self.create_manager(
+            DEFAULT, load_spawn_manager(settings.spawn_experiment_default)
+        )
+        arms = [
+            Arm(name, self.create_manager(name, load_spawn_manager(path)), weight)
+            for name, path, weight in settings.spawn_experiment_arms
+        ]
+        return default, arms
+
+    def create_manager(self, arm: str, manager_class: type[BaseSpawnManager]) -> BaseSpawnManager:
+        manager = manager_class(self.bot)
+        if not isinstance(manager, SpawnManager) or arm == DEFAULT:
+            return manager
+        # the cooldowns of each arm are reported separately
+        manager.cooldowns.name = arm
+        # the guilds of the default manager keep the file used without experiment
+        if manager.snapshot_path:
+            path = manager.snapshot_path
+            manager.snapshot_path = path.with_name(f"{path.stem}-{arm}{path.suffix}")
+        return manager
+
+    def bucket(self, guild_id: int, salt: str) -> float:
+        """
+        Return a number between 0 and 100 derived from the guild ID, the experiment name and
+        the salt.
+        """
+        digest = hashlib.blake2b(f"{self.name}:{salt}:{guild_id}".encode(), digest_size=8).digest()
+        return int.from_bytes(digest) / 2**64 * 100
+
+    def assign(self, guild_id: int) -> str:
+        """
+        Return the name of the arm of a guild.
+        """
+        enrollment = self.bucket(guild_id, "enrollment")
+        if enrollment >= 100 - settings.spawn_experiment_holdout:
+            return HOLDOUT
+        if enrollment >= settings.spawn_experiment_ramp or self.total_weight <= 0:
+            return DEFAULT
+        point = self.bucket(guild_id, "arm") / 100 * self.total_weight
+        for arm in self.arms:
+            if point < arm.weight:
+                return arm.name
+            point -= arm.weight
+        # rounding errors
+        return self.arms[-1].name
+
+    def get_arm(self, guild_id: int) -> str:
+        arm = self.assignments.get(guild_id)
+        if arm is None:
+            arm = self.assignments[guild_id] = self.assign(guild_id)
+            spawn_experiment_guilds.labels(experiment=self.name, arm=arm).inc()
+        return arm
+
+    async def handle_message(self, message: discord.Message) -> bool | tuple[Literal[True], str]:
+        if not message.guild:
+            return False
+        arm = self.get_arm(message.guild.id)
+        start = time.perf_counter()
+        result = await self.managers[arm].handle_message(message)
+        self.decision_time[arm].observe(time.perf_counter() - start)
+        if result is False:
+            return False
+        spawn_experiment_spawns.labels(experiment=self.name, arm=arm).inc()
+        return True, self.algo(arm, result)
+
+    def algo(self, arm: str, result: bool | tuple[Literal[True], str]) -> str:
+        """
+        Return the algorithm reported for a spawn of an arm, used to label the catches.
+        """
+        if isinstance(result, tuple):
+            return f"{arm}-{result[1]}"
+        return arm
+
+    def forget(self, guild_id: int):
+        arm = self.assignments.pop(guild_id, None)
+        if arm is not None:
+            spawn_experiment_guilds.labels(experiment=self.name, arm=arm).dec()
+        else:
+            # restored cooldowns of guilds that did not send a message since the restart
+            arm = self.assign(guild_id)
+        self.managers[arm].forget(guild_id)
+
+    def unique_managers(self) -> list[BaseSpawnManager]:
+        # the default manager is shared by two arms, or more with subclasses
+        return list({id(x): x for x in self.managers.values()}.values())
+
+    async def load_state(self):
+        await asyncio.gather(*(x.load_state() for x in self.unique_managers()))
+
+    async def save_state(self):
+        await asyncio.gather(*(x.save_state() for x in self.unique_managers()))
+
+    async def admin_explain(
+        self, interaction: discord.Interaction["BallsDexBot"], guild: discord.Guild
+    ):
+        arm = self.get_arm(guild.id)
+        manager = self.managers[arm]
+        await manager.admin_explain(interaction, guild)
+        if arm in (DEFAULT, HOLDOUT):
+            share = "not enrolled" if arm == DEFAULT else "holdout"
+        else:
+            weight = next(x.weight for x in self.arms if x.name == arm)
+            share = f"{weight / self.total_weight:.0%} of the enrolled guilds"
+        await interaction.followup.send(
+            f"[Spawn experiment {self.name}] Server {guild.name} ({guild.id}) has been assigned "
+            f"to arm {arm} (`{manager.__class__.__name__}`, {share})",
+            ephemeral=True,
+        )
@@ -1,15 +1,27 @@
 import asyncio
 import logging
+import os
 import random
+import struct
+import sys
+import time
 from abc import abstractmethod
-from collections import deque, namedtuple
+from array import array
+from collections import OrderedDict
 from dataclasses import dataclass, field
-from datetime import datetime
-from typing import TYPE_CHECKING, Literal
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterator, Literal
 
 import discord
 from discord.utils import format_dt
 
+from ballsdex.core.metrics import (
+    spawn_cooldowns,
+    spawn_cooldowns_bytes,
+    spawn_cooldowns_snapshot_bytes,
+    spawn_cooldowns_snapshot_time,
+)
 from ballsdex.settings import settings
 
 if TYPE_CHECKING:
@@ -17,7 +29,13 @@ if TYPE_CHECKING:
 
 log = logging.getLogger("ballsdex.packages.countryballs")
 
-CachedMessage = namedtuple("CachedMessage", ["content", "author_id"])
+# minimum delay in seconds between two messages increasing the count of a guild
+INCREASE_COOLDOWN = 10
+# delay in seconds between two passes compacting and forgetting idle cooldowns
+SWEEP_INTERVAL = 60
+SNOWFLAKE_SIZE = sys.getsizeof(2**60)
+# number of cooldowns serialized before yielding to the event loop when saving
+SNAPSHOT_CHUNK_SIZE = 500
 
 
 class BaseSpawnManager:
@@ -73,6 +91,162 @@ class BaseSpawnManager:
         """
         raise NotImplementedError
 
+    def forget(self, guild_id: int):
+        """
+        Invoked when the bot leaves a guild or spawns are disabled in it, this function should
+        release the state kept for that guild.
+
+        Parameters
+        ----------
+        guild_id: int
+            The ID of the guild
+        """
+        pass
+
+    async def load_state(self):
+        """
+        Invoked on cog load, this function can restore the state saved by `save_state`.
+        """
+        pass
+
+    async def save_state(self):
+        """
+        Invoked periodically and on cog unload, this function can save the state that should
+        survive a restart or a reload.
+        """
+        pass
+
+
+class ChatterStats:
+    """
+    Authors and content lengths of the most recent messages in a guild, with the number of
+    messages of each author kept up to date as messages are added and evicted.
+
+    Only what the spawn penalties need is stored, in fixed-size arrays.
+
+    Parameters
+    ----------
+    maxlen: int
+        Number of recent messages to keep.
+    """
+
+    __slots__ = ("maxlen", "authors", "lengths", "position", "size", "counts", "short_messages")
+
+    # content lengths are capped to fit in a byte, only short messages matter
+    SHORT_MESSAGE_LENGTH = 5
+
+    def __init__(self, maxlen: int = 100):
+        self.maxlen = maxlen
+        # ring buffers, `position` is the index of the next message
+        self.authors = array("Q", bytes(8 * maxlen))
+        self.lengths = bytearray(maxlen)
+        self.position = 0
+        self.size = 0
+        self.counts: dict[int, int] = {}
+        self.short_messages = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def push(self, author_id: int, content_length: int):
+        """
+        Add a message, evicting the oldest one if the maximum length is reached.
+        """
+        i = self.position
+        if self.size == self.maxlen:
+            evicted = self.authors[i]
+            if self.counts[evicted] == 1:
+                del self.counts[evicted]
+            else:
+                self.counts[evicted] -= 1
+            if self.lengths[i] < self.SHORT_MESSAGE_LENGTH:
+                self.short_messages -= 1
+        else:
+            self.size += 1
+        self.authors[i] = author_id
+        self.lengths[i] = min(content_length, 255)
+        self.counts[author_id] = self.counts.get(author_id, 0) + 1
+        if content_length < self.SHORT_MESSAGE_LENGTH:
+            self.short_messages += 1
+        self.position = (i + 1) % self.maxlen
+
+    @property
+    def chatters(self) -> int:
+        """
+        Number of distinct authors.
+        """
+        return len(self.counts)
+
+    def count(self, author_id: int) -> int:
+        """
+        Number of messages of an author.
+        """
+        return self.counts.get(author_id, 0)
+
+    def top_count(self) -> int:
+        """
+        Number of messages of the most active author.
+        """
+        return max(self.counts.values(), default=0)
+
+    def __iter__(self) -> Iterator[tuple[int, int]]:
+        """
+        Iterate over the author ID and content length of the messages, oldest first.
+        """
+        start = (self.position - self.size) % self.maxlen
+        for i in range(start, start + self.size):
+            yield self.authors[i % self.maxlen], self.lengths[i % self.maxlen]
+
+    def memory_size(self) -> int:
+        """
+        Approximate number of bytes used by this object.
+        """
+        # the author IDs are snowflakes, all stored as ints of the same size
+        return (
+            sys.getsizeof(self)
+            + sys.getsizeof(self.authors)
+            + sys.getsizeof(self.lengths)
+            + sys.getsizeof(self.counts)
+            + SNOWFLAKE_SIZE * len(self.counts)
+        )
+
+    def to_bytes(self) -> bytes:
+        """
+        Serialize the messages compactly: the distinct authors followed by the index of the
+        author and the length of each message.
+        """
+        authors = array("Q", self.counts)
+        index = {x: i for i, x in enumerate(authors)}
+        messages = list(self)
+        return b"".join(
+            (
+                struct.pack("<HH", self.maxlen, len(authors)),
+                authors.tobytes(),
+                array("H", (index[x] for x, _ in messages)).tobytes(),
+                bytes(x for _, x in messages),
+            )
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes | memoryview) -> "ChatterStats":
+        """
+        Restore the messages serialized with `to_bytes`.
+        """
+        data = memoryview(data)
+        maxlen, author_count = struct.unpack_from("<HH", data)
+        offset = 4
+        authors = array("Q")
+        authors.frombytes(data[offset : offset + 8 * author_count])
+        offset += 8 * author_count
+        size = (len(data) - offset) // 3
+        index = array("H")
+        index.frombytes(data[offset : offset + 2 * size])
+        lengths = data[offset + 2 * size :]
+        stats = cls(maxlen)
+        for i, length in zip(index, lengths):
+            stats.push(authors[i], length)
+        return stats
+
 
 @dataclass
 class SpawnCooldown:
@@ -90,11 +264,11 @@ class SpawnCooldown:
     threshold: int
         The number `scaled_message_count` has to reach for spawn.
         Determined randomly with `SPAWN_CHANCE_RANGE`
-    lock: asyncio.Lock
-        Used to ratelimit messages and ignore fast spam
-    message_cache: ~collections.deque[CachedMessage]
-        A list of recent messages used to reduce the spawn chance when too few different chatters
-        are present. Limited to the 100 most recent messages in the guild.
+    cooldown_until: float
+        Monotonic time until which messages don't increase the count, used to ignore fast spam
+    message_cache: ChatterStats
+        Statistics of the recent messages used to reduce the spawn chance when too few different
+        chatters are present. Limited to the 100 most recent messages in the guild.
     """
 
     time: datetime
@@ -103,60 +277,287 @@ class SpawnCooldown:
         default_factory=lambda: settings.spawn_chance_range[0] // 2
     )
     threshold: int = field(default_factory=lambda: random.randint(*settings.spawn_chance_range))
-    lock: asyncio.Lock = field(default_factory=asyncio.Lock, init=False)
-    message_cache: deque[CachedMessage] = field(default_factory=lambda: deque(maxlen=100))
+    cooldown_until: float = field(default=0.0, init=False)
+    message_cache: ChatterStats = field(default_factory=lambda: ChatterStats(maxlen=100))
+
+    # creation time, count and threshold, followed by the chatter statistics
+    HEADER = struct.Struct("<ddI")
 
     def reset(self, time: datetime):
         self.scaled_message_count = 1.0
         self.threshold = random.randint(*settings.spawn_chance_range)
-        try:
-            self.lock.release()
-        except RuntimeError:  # lock is not acquired
-            pass
         self.time = time
 
-    async def increase(self, message: discord.Message) -> bool:
-        # this is a deque, not a list
-        # its property is that, once the max length is reached (100 for us),
-        # the oldest element is removed, thus we only have the last 100 messages in memory
-        self.message_cache.append(
-            CachedMessage(content=message.content, author_id=message.author.id)
-        )
+    def on_cooldown(self, now: float | None = None) -> bool:
+        return (time.monotonic() if now is None else now) < self.cooldown_until
 
-        if self.lock.locked():
-            return False
+    def increase(self, message: discord.Message, now: float | None = None) -> bool:
+        """
+        Cache a message and increase the count, unless a message was counted less than
+        `INCREASE_COOLDOWN` seconds ago.
 
-        async with self.lock:
-            message_multiplier = 1
-            if message.guild.member_count < 5 or message.guild.member_count > 1000:  # type: ignore
-                message_multiplier /= 2
-            if message._state.intents.message_content and len(message.content) < 5:
-                message_multiplier /= 2
-            if len(set(x.author_id for x in self.message_cache)) < 4 or (
-                len(list(filter(lambda x: x.author_id == message.author.id, self.message_cache)))
-                / self.message_cache.maxlen  # type: ignore
-                > 0.4
-            ):
-                message_multiplier /= 2
-            self.scaled_message_count += message_multiplier
-            await asyncio.sleep(10)
+        Parameters
+        ----------
+        message: discord.Message
+            The message sent in the guild.
+        now: float | None
+            Current monotonic time, `time.monotonic()` by default.
+
+        Returns
+        -------
+        bool
+            Whether the count was increased.
+        """
+        # once the max length is reached (100 for us), the oldest message is evicted, thus we
+        # only have the last 100 messages in memory
+        self.message_cache.push(message.author.id, len(message.content))
+
+        if now is None:
+            now = time.monotonic()
+        if now < self.cooldown_until:
+            return False
+        self.cooldown_until = now + INCREASE_COOLDOWN
+
+        message_multiplier = 1
+        if message.guild.member_count < 5 or message.guild.member_count > 1000:  # type: ignore
+            message_multiplier /= 2
+        if message._state.intents.message_content and len(message.content) < 5:
+            message_multiplier /= 2
+        if self.message_cache.chatters < 4 or (
+            self.message_cache.count(message.author.id) / self.message_cache.maxlen > 0.4
+        ):
+            message_multiplier /= 2
+        self.scaled_message_count += message_multiplier
         return True
 
+    def memory_size(self) -> int:
+        """
+        Approximate number of bytes used by this object.
+        """
+        return (
+            sys.getsizeof(self)
+            + sys.getsizeof(self.__dict__)
+            + sys.getsizeof(self.time)
+            + self.message_cache.memory_size()
+        )
+
+    def to_bytes(self) -> bytes:
+        """
+        Serialize this cooldown compactly. The increase cooldown is not kept.
+        """
+        return (
+            self.HEADER.pack(self.time.timestamp(), self.scaled_message_count, self.threshold)
+            + self.message_cache.to_bytes()
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SpawnCooldown":
+        """
+        Restore a cooldown serialized with `to_bytes`.
+        """
+        timestamp, scaled_message_count, threshold = cls.HEADER.unpack_from(data)
+        return cls(
+            datetime.fromtimestamp(timestamp, timezone.utc),
+            scaled_message_count=scaled_message_count,
+            threshold=threshold,
+            message_cache=ChatterStats.from_bytes(memoryview(data)[cls.HEADER.size :]),
+        )
+
+
+class CooldownStore:
+    """
+    The spawn cooldowns of the guilds, bounded in memory.
+
+    Cooldowns are kept as objects while their guild is active. Those of guilds idle for more
+    than `idle_timeout`, or the least recently active ones beyond `max_active`, are serialized
+    and restored on the next message. Cooldowns idle for more than `expiry` are dropped.
+
+    Times are given by the monotonic clock of the spawn manager. `name` labels the metrics,
+    each store of a process needs its own.
+    """
+
+    def __init__(self, max_active: int, idle_timeout: float, expiry: float, name: str = "default"):
+        self.name = name
+        self.max_active = max_active
+        self.idle_timeout = idle_timeout
+        self.expiry = expiry
+        # guild ID -> (last activity, cooldown), least recently active first
+        self.active: OrderedDict[int, tuple[float, SpawnCooldown]] = OrderedDict()
+        self.compact: OrderedDict[int, tuple[float, bytes]] = OrderedDict()
+        self.compact_bytes = 0
+        self.next_sweep = 0.0
+
+    def __len__(self) -> int:
+        return len(self.active) + len(self.compact)
+
+    def __contains__(self, guild_id: int) -> bool:
+        return guild_id in self.active or guild_id in self.compact
+
+    def get(self, guild_id: int, now: float | None = None) -> SpawnCooldown | None:
+        """
+        Return the cooldown of a guild, restoring it if it was compacted. If `now` is given,
+        the guild is marked as active at that time.
+        """
+        if item := self.active.get(guild_id):
+            cooldown = item[1]
+        elif item := self._pop_compact(guild_id):
+            cooldown = SpawnCooldown.from_bytes(item[1])
+            self.active[guild_id] = (item[0], cooldown)
+            self._trim()
+        else:
+            return None
+        if now is not None:
+            self.active[guild_id] = (now, cooldown)
+            self.active.move_to_end(guild_id)
+        return cooldown
+
+    def set(self, guild_id: int, cooldown: SpawnCooldown, now: float):
+        self._pop_compact(guild_id)
+        self.active[guild_id] = (now, cooldown)
+        self.active.move_to_end(guild_id)
+        self._trim()
+
+    def discard(self, guild_id: int):
+        self.active.pop(guild_id, None)
+        self._pop_compact(guild_id)
+
+    def _pop_compact(self, guild_id: int) -> tuple[float, bytes] | None:
+        item = self.compact.pop(guild_id, None)
+        if item:
+            self.compact_bytes -= sys.getsizeof(item[1])
+        return item
+
+    def _compact_oldest(self):
+        guild_id, (last_seen, cooldown) = self.active.popitem(last=False)
+        data = cooldown.to_bytes()
+        self.compact[guild_id] = (last_seen, data)
+        self.compact_bytes += sys.getsizeof(data)
+
+    def _trim(self):
+        while len(self.active) > self.max_active:
+            self._compact_oldest()
+
+    def sweep(self, now: float):
+        """
+        Compact and drop the idle cooldowns, then update the metrics. Does nothing if the last
+        pass was less than `SWEEP_INTERVAL` seconds ago.
+        """
+        if now < self.next_sweep:
+            return
+        self.next_sweep = now + SWEEP_INTERVAL
+        while self.active and now - next(iter(self.active.values()))[0] > self.idle_timeout:
+            self._compact_oldest()
+        # compacted cooldowns are not always ordered by activity since the trim can compact
+        # recent ones, iterate over all of them
+        for guild_id, (last_seen, _) in list(self.compact.items()):
+            if now - last_seen > self.expiry:
+                self._pop_compact(guild_id)
+        self.update_metrics()
+
+    # file signature and wall clock time of the snapshot
+    SNAPSHOT_HEADER = struct.Struct("<4sd")
+    SNAPSHOT_MAGIC = b"BDC1"
+    # guild ID, seconds since the last activity and size of the serialized cooldown
+    SNAPSHOT_ENTRY = struct.Struct("<QdI")
+
+    async def snapshot(self, now: float) -> bytes:
+        """
+        Serialize all the cooldowns. This yields to the event loop regularly, cooldowns
+        modified meanwhile may be saved in either state.
+        """
+        parts = [self.SNAPSHOT_HEADER.pack(self.SNAPSHOT_MAGIC, time.time())]
+        compact = list(self.compact.items())
+        active = list(self.active.items())
+        for guild_id, (last_seen, data) in compact:
+            parts.append(self.SNAPSHOT_ENTRY.pack(guild_id, now - last_seen, len(data)))
+            parts.append(data)
+        for i, (guild_id, (last_seen, cooldown)) in enumerate(active, start=1):
+            data = cooldown.to_bytes()
+            parts.append(self.SNAPSHOT_ENTRY.pack(guild_id, now - last_seen, len(data)))
+            parts.append(data)
+            if i % SNAPSHOT_CHUNK_SIZE == 0:
+                await asyncio.sleep(0)
+        return b"".join(parts)
+
+    def restore(self, data: bytes, now: float) -> int:
+        """
+        Load the cooldowns of a snapshot in their compact form, they will be deserialized on
+        the next message of their guild. Cooldowns already present are kept.
+
+        Returns
+        -------
+        int
+            The number of cooldowns restored.
+        """
+        magic, timestamp = self.SNAPSHOT_HEADER.unpack_from(data)
+        if magic != self.SNAPSHOT_MAGIC:
+            raise ValueError("Not a spawn cooldowns snapshot")
+        age = max(time.time() - timestamp, 0)
+        entries: list[tuple[float, int, bytes]] = []
+        offset = self.SNAPSHOT_HEADER.size
+        while offset < len(data):
+            guild_id, idle, size = self.SNAPSHOT_ENTRY.unpack_from(data, offset)
+            offset += self.SNAPSHOT_ENTRY.size
+            if idle + age <= self.expiry and guild_id not in self:
+                entries.append((now - idle - age, guild_id, data[offset : offset + size]))
+            offset += size
+        entries.sort()
+        for last_seen, guild_id, cooldown in entries:
+            self.compact[guild_id] = (last_seen, cooldown)
+            self.compact_bytes += sys.getsizeof(cooldown)
+        self.update_metrics()
+        return len(entries)
+
+    def update_metrics(self):
+        spawn_cooldowns.labels(manager=self.name, state="active").set(len(self.active))
+        spawn_cooldowns.labels(manager=self.name, state="compact").set(len(self.compact))
+        spawn_cooldowns_bytes.labels(manager=self.name, state="active").set(
+            sum(x.memory_size() for _, x in self.active.values())
+        )
+        spawn_cooldowns_bytes.labels(manager=self.name, state="compact").set(self.compact_bytes)
+
+
+def write_snapshot(path: Path, data: bytes):
+    # write to a temporary file first, a crash must not leave a truncated snapshot
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
 
 class SpawnManager(BaseSpawnManager):
     def __init__(self, bot: "BallsDexBot"):
         super().__init__(bot)
-        self.cooldowns: dict[int, SpawnCooldown] = {}
+        self.cooldowns = CooldownStore(
+            settings.spawn_cooldowns_max_active,
+            settings.spawn_cooldowns_idle_timeout,
+            settings.spawn_cooldowns_expiry,
+        )
+        # source of the monotonic time used for the increase cooldown and the idle cooldowns
+        self.clock: Callable[[], float] = time.monotonic
+        # file where the cooldowns are saved, each instance needs its own
+        self.snapshot_path: Path | None = None
+        if settings.spawn_cooldowns_snapshot_path:
+            path = Path(settings.spawn_cooldowns_snapshot_path)
+            # processes running different shards must not overwrite each other's cooldowns
+            if settings.shard_ids is not None:
+                shards = "-".join(str(x) for x in sorted(settings.shard_ids))
+                path = path.with_name(f"{path.stem}-{shards}{path.suffix}")
+            self.snapshot_path = path
 
     async def handle_message(self, message: discord.Message) -> bool:
         guild = message.guild
         if not guild:
             return False
 
-        cooldown = self.cooldowns.get(guild.id, None)
+        now = self.clock()
+        self.cooldowns.sweep(now)
+        cooldown = self.cooldowns.get(guild.id, now)
         if not cooldown:
             cooldown = SpawnCooldown(message.created_at)
-            self.cooldowns[guild.id] = cooldown
+            self.cooldowns.set(guild.id, cooldown, now)
 
         delta_t = (message.created_at - cooldown.time).total_seconds()
         # change how the threshold varies according to the member count, while nuking farm servers
@@ -172,7 +573,7 @@ class SpawnManager(BaseSpawnManager):
             time_multiplier = 0.2
 
         # manager cannot be increased more than once per 10 seconds
-        if not await cooldown.increase(message):
+        if not cooldown.increase(message, now):
             return False
 
         # normal increase, need to reach goal
@@ -188,6 +589,34 @@ class SpawnManager(BaseSpawnManager):
         cooldown.reset(message.created_at)
         return True
 
+    def forget(self, guild_id: int):
+        self.cooldowns.discard(guild_id)
+
+    async def load_state(self):
+        path = self.snapshot_path
+        if not path or not path.exists():
+            return
+        start = time.perf_counter()
+        try:
+            data = await asyncio.to_thread(path.read_bytes)
+            count = self.cooldowns.restore(data, self.clock())
+        except Exception:
+            log.exception(f"Failed to restore the spawn cooldowns from {path}")
+            return
+        spawn_cooldowns_snapshot_time.labels(operation="load").observe(time.perf_counter() - start)
+        log.info(f"Restored {count} spawn cooldowns.")
+
+    async def save_state(self):
+        path = self.snapshot_path
+        if not path:
+            return
+        start = time.perf_counter()
+        data = await self.cooldowns.snapshot(self.clock())
+        await asyncio.to_thread(write_snapshot, path, data)
+        spawn_cooldowns_snapshot_time.labels(operation="save").observe(time.perf_counter() - start)
+        spawn_cooldowns_snapshot_bytes.labels(manager=self.cooldowns.name).set(len(data))
+        log.debug(f"Saved {len(self.cooldowns)} spawn cooldowns ({len(data)} bytes).")
+
     async def admin_explain(
         self, interaction: discord.Interaction["BallsDexBot"], guild: discord.Guild
     ):
@@ -227,20 +656,12 @@ class SpawnManager(BaseSpawnManager):
         penalities: list[str] = []
         if guild.member_count < 5 or guild.member_count > 1000:
             penalities.append("Server has less than 5 or more than 1000 members")
-        if any(len(x.content) < 5 for x in cooldown.message_cache):
+        if cooldown.message_cache.short_messages:
             penalities.append("Some cached messages are less than 5 characters long")
 
-        authors_set = set(x.author_id for x in cooldown.message_cache)
-        low_chatters = len(authors_set) < 4
+        low_chatters = cooldown.message_cache.chatters < 4
         # check if one author has more than 40% of messages in cache
-        major_chatter = any(
-            (
-                len(list(filter(lambda x: x.author_id == author, cooldown.message_cache)))
-                / cooldown.message_cache.maxlen  # type: ignore
-                > 0.4
-            )
-            for author in authors_set
-        )
+        major_chatter = cooldown.message_cache.top_count() / cooldown.message_cache.maxlen > 0.4
         # this mess is needed since either conditions make up to a single penality
         if low_chatters:
             if not major_chatter:
@@ -275,7 +696,7 @@ class SpawnManager(BaseSpawnManager):
         )
 
         informations: list[str] = []
-        if cooldown.lock.locked():
+        if cooldown.on_cooldown(self.clock()):
             informations.append("The manager is currently on cooldown.")
         if delta < 600:
             informations.append(
@@ -707,5 +707,7 @@ class TradeViewMenu(Pages):
                 ephemeral=True,
             )
 
-        paginator = CountryballsViewer(interaction, [x.pk for x in ball_instances])
+        paginator = CountryballsViewer(
+            interaction, [x.pk for x in ball_instances], thumbnail=settings.card_thumbnails
+        )
         await paginator.start()
@@ -25,6 +25,8 @@ class Settings:
     shard_count: int | None
         The number of shards to use for this bot instance.
         Must be equal to the one set in the gateway proxy if used.
+    shard_ids: list[int] | None
+        The shards run by this process, all of them if `None`. Requires `shard_count`.
     prefix: str
         Prefix for text commands, mostly unused. Defaults to "b."
     collectible_name: str
@@ -71,11 +73,85 @@ class Settings:
         ID of the Discord application
     client_secret: str
         Secret key of the Discord application (not the bot token)
+    card_cache_memory_size: int
+        Maximum size in megabytes of rendered cards kept in memory, 0 to disable
+    card_cache_disk_path: str | None
+        Directory where rendered cards are cached on disk, disabled if `None`
+    card_cache_disk_size: int
+        Maximum size in megabytes of the rendered cards cached on disk
+    asset_cache_size: int
+        Maximum size in megabytes of the decoded backgrounds, artworks and icons kept in memory
+    layer_cache_size: int
+        Maximum size in megabytes of the pre-drawn cards without stats kept in memory
+    text_cache_size: int
+        Maximum size in megabytes of the rasterized card texts kept in memory
+    render_pool_mode: str
+        Either "thread" or "process", the kind of workers rendering cards
+    render_pool_workers: int | None
+        Number of card rendering workers, defaults to the number of CPUs
+    render_queue_size: int
+        Maximum number of cards waiting or being rendered before new requests have to wait
+    card_format: str
+        Image format of the rendered cards, "WEBP", "PNG" or "JPEG"
+    card_quality: int
+        Quality of lossy card images, from 0 to 100
+    card_method: int
+        WEBP encoding effort, from 0 (fast) to 6 (small)
+    card_lossless: bool
+        Whether to encode WEBP cards without loss
+    card_downscale: float
+        Scale applied to cards sent outside of the info command, 1 to keep the full size
+    card_thumbnails: bool
+        Whether to send small cards in the list, last and trade viewer commands
+    wild_card_cache_size: int
+        Maximum size in megabytes of the spawn images kept in memory, 0 to disable
+    wild_card_max_size: int
+        Maximum width and height of the copies of spawn images made by the admin panel,
+        0 to upload the original files
+    catalog_listen: bool
+        Whether to apply the catalog changes made in the admin panel as they happen
+    catalog_resync_interval: int
+        Seconds between full reloads of the catalog while listening to changes, 0 to disable
+    spawn_cooldowns_max_active: int
+        Maximum number of spawn cooldowns kept as objects, the least recently active guilds are
+        compacted beyond that
+    spawn_cooldowns_idle_timeout: int
+        Seconds without messages after which the spawn cooldown of a guild is compacted
+    spawn_cooldowns_expiry: int
+        Seconds without messages after which the spawn cooldown of a guild is forgotten
+    spawn_cooldowns_snapshot_path: str | None
+        File where the spawn cooldowns are saved to be restored after a restart, disabled if
+        `None`. The IDs of `shard_ids` are appended to the name if set.
+    spawn_cooldowns_snapshot_interval: int
+        Seconds between two saves of the spawn cooldowns, in addition to the one on shutdown
+    spawn_dispatch_workers: int
+        Number of tasks sending the spawn messages
+    spawn_dispatch_queue_size: int
+        Maximum number of spawns waiting to be sent, new ones are dropped beyond that
+    spawn_dispatch_rate: float
+        Maximum number of spawn messages sent per second across all channels
+    spawn_dispatch_channel_interval: float
+        Minimum number of seconds between two spawns in the same channel
+    spawn_dispatch_attempts: int
+        Number of tries to send a spawn message when Discord is rate limiting or unavailable
+    spawn_experiment_name: str
+        Name of the spawn experiment, used to assign the guilds
+    spawn_experiment_arms: list[tuple[str, str, float]]
+        Name, Python path of the spawn manager and weight of each arm of the spawn experiment
+    spawn_experiment_ramp: float
+        Percentage of the guilds enrolled in the spawn experiment
+    spawn_experiment_holdout: float
+        Percentage of the guilds never enrolled in the spawn experiment
+    spawn_experiment_default: str
+        Python path of the spawn manager used for the guilds not enrolled in the experiment
+    catch_fold_accents: bool
+        Whether to ignore accents when comparing guesses with the names of a ball
     """
 
     bot_token: str = ""
     gateway_url: str | None = None
     shard_count: int | None = None
+    shard_ids: list[int] | None = None
     prefix: str = "b."
 
     collectible_name: str = "countryball"
@@ -119,6 +195,50 @@ class Settings:
     spawn_chance_range: tuple[int, int] = (40, 55)
     spawn_manager: str = "ballsdex.packages.countryballs.spawn.SpawnManager"
 
+    # card rendering
+    card_cache_memory_size: int = 64
+    card_cache_disk_path: str | None = None
+    card_cache_disk_size: int = 512
+    asset_cache_size: int = 256
+    layer_cache_size: int = 256
+    text_cache_size: int = 64
+    render_pool_mode: str = "thread"
+    render_pool_workers: int | None = None
+    render_queue_size: int = 64
+    card_format: str = "WEBP"
+    card_quality: int = 80
+    card_method: int = 4
+    card_lossless: bool = False
+    card_downscale: float = 1.0
+    card_thumbnails: bool = False
+    wild_card_cache_size: int = 32
+    wild_card_max_size: int = 0
+
+    # catalog synchronization
+    catalog_listen: bool = True
+    catalog_resync_interval: int = 3600
+
+    # spawn cooldowns memory
+    spawn_cooldowns_max_active: int = 10000
+    spawn_cooldowns_idle_timeout: int = 3600
+    spawn_cooldowns_expiry: int = 1209600
+    spawn_cooldowns_snapshot_path: str | None = "spawn-cooldowns.bin"
+    spawn_cooldowns_snapshot_interval: int = 300
+
+    # spawn messages
+    spawn_dispatch_workers: int = 4
+    spawn_dispatch_queue_size: int = 1000
+    spawn_dispatch_rate: float = 20
+    spawn_dispatch_channel_interval: float = 5
+    spawn_dispatch_attempts: int = 3
+
+    # spawn experiment
+    spawn_experiment_name: str = "spawn"
+    spawn_experiment_arms: list[tuple[str, str, float]] = field(default_factory=list)
+    spawn_experiment_ramp: float = 100
+    spawn_experiment_holdout: float = 0
+    spawn_experiment_default: str = "ballsdex.packages.countryballs.spawn.SpawnManager"
+
     # django admin panel
     webhook_url: str | None = None
     admin_url: str | None = None
@@ -135,6 +255,7 @@ class Settings:
     slow_messages: list[str] = field(default_factory=list)
 
     catch_button_label: str = "Catch me!"
+    catch_fold_accents: bool = False
 
 
 settings = Settings()
@@ -146,6 +267,7 @@ def read_settings(path: "Path"):
     settings.bot_token = content["discord-token"]
     settings.gateway_url = content.get("gateway-url")
     settings.shard_count = content.get("shard-count")
+    settings.shard_ids = content.get("shard-ids")
     settings.prefix = str(content.get("text-prefix") or "b.")
     settings.team_owners = content.get("owners", {}).get("team-members-are-owners", False)
     settings.co_owners = content.get("owners", {}).get("co-owners", [])
@@ -198,6 +320,57 @@ def read_settings(path: "Path"):
         "spawn-manager", "ballsdex.packages.countryballs.spawn.SpawnManager"
     )
 
+    if rendering := content.get("card-rendering"):
+        settings.card_cache_memory_size = rendering.get("memory-cache-size", 64)
+        settings.card_cache_disk_path = rendering.get("disk-cache-path")
+        settings.card_cache_disk_size = rendering.get("disk-cache-size", 512)
+        settings.asset_cache_size = rendering.get("asset-cache-size", 256)
+        settings.layer_cache_size = rendering.get("layer-cache-size", 256)
+        settings.text_cache_size = rendering.get("text-cache-size", 64)
+        settings.render_pool_mode = rendering.get("pool-mode", "thread")
+        settings.render_pool_workers = rendering.get("pool-workers")
+        settings.render_queue_size = rendering.get("queue-size", 64)
+        settings.card_format = rendering.get("format", "WEBP").upper()
+        settings.card_quality = rendering.get("quality", 80)
+        settings.card_method = rendering.get("method", 4)
+        settings.card_lossless = rendering.get("lossless", False)
+        settings.card_downscale = rendering.get("downscale", 1.0)
+        settings.card_thumbnails = rendering.get("thumbnails", False)
+        settings.wild_card_cache_size = rendering.get("wild-card-cache-size", 32)
+        settings.wild_card_max_size = rendering.get("wild-card-max-size", 0)
+
+    if catalog := content.get("catalog-sync"):
+        settings.catalog_listen = catalog.get("listen", True)
+        settings.catalog_resync_interval = catalog.get("resync-interval", 3600)
+
+    if cooldowns := content.get("spawn-cooldowns"):
+        settings.spawn_cooldowns_max_active = cooldowns.get("max-active", 10000)
+        settings.spawn_cooldowns_idle_timeout = cooldowns.get("idle-timeout", 3600)
+        settings.spawn_cooldowns_expiry = cooldowns.get("expiry", 1209600)
+        settings.spawn_cooldowns_snapshot_path = cooldowns.get(
+            "snapshot-path", "spawn-cooldowns.bin"
+        )
+        settings.spawn_cooldowns_snapshot_interval = cooldowns.get("snapshot-interval", 300)
+
+    if dispatch := content.get("spawn-dispatch"):
+        settings.spawn_dispatch_workers = dispatch.get("workers", 4)
+        settings.spawn_dispatch_queue_size = dispatch.get("queue-size", 1000)
+        settings.spawn_dispatch_rate = dispatch.get("rate", 20)
+        settings.spawn_dispatch_channel_interval = dispatch.get("channel-interval", 5)
+        settings.spawn_dispatch_attempts = dispatch.get("attempts", 3)
+
+    if experiment := content.get("spawn-experiment"):
+        settings.spawn_experiment_name = experiment.get("name", "spawn")
+        settings.spawn_experiment_arms = [
+            (arm["name"], arm["manager"], arm.get("weight", 1))
+            for arm in experiment.get("arms") or []
+        ]
+        settings.spawn_experiment_ramp = experiment.get("ramp", 100)
+        settings.spawn_experiment_holdout = experiment.get("holdout", 0)
+        settings.spawn_experiment_default = experiment.get(
+            "default-manager", "ballsdex.packages.countryballs.spawn.SpawnManager"
+        )
+
     if admin := content.get("admin-panel"):
         settings.webhook_url = admin.get("webhook-url")
         settings.client_id = admin.get("client-id")
@@ -216,6 +389,7 @@ def read_settings(path: "Path"):
             "{user} Sorry, this {collectible} was caught already!"
         ]
         settings.catch_button_label = catch.get("catch_button_label", "Catch me!")
+        settings.catch_fold_accents = catch.get("fold_accents", False)
 
     # avoids signaling needed migrations
     if "makemigrations" in sys.argv or "migrate" in sys.argv:
@@ -360,6 +534,136 @@ spawn-chance-range: [40, 55]
 
 spawn-manager: ballsdex.packages.countryballs.spawn.SpawnManager
 
+# card rendering settings
+card-rendering:
+
+  # maximum size in megabytes of the rendered cards kept in memory, 0 to disable
+  memory-cache-size: 64
+
+  # directory where rendered cards are cached on disk, leave empty to disable
+  disk-cache-path:
+
+  # maximum size in megabytes of the rendered cards cached on disk
+  disk-cache-size: 512
+
+  # maximum size in megabytes of the decoded backgrounds, artworks and icons kept in memory
+  asset-cache-size: 256
+
+  # maximum size in megabytes of the pre-drawn cards without stats kept in memory
+  layer-cache-size: 256
+
+  # maximum size in megabytes of the rasterized card texts kept in memory
+  text-cache-size: 64
+
+  # cards are rendered by a pool of workers, either "thread" or "process"
+  # processes use more memory but do not slow down the rest of the bot
+  pool-mode: thread
+
+  # number of workers rendering cards, leave empty to use the number of CPUs
+  pool-workers:
+
+  # maximum number of cards waiting or being rendered, further requests will wait
+  queue-size: 64
+
+  # image format of the cards, "WEBP", "PNG" or "JPEG" (no transparency)
+  format: WEBP
+
+  # quality of WEBP and JPEG cards, from 0 to 100
+  quality: 80
+
+  # WEBP encoding effort, from 0 (faster) to 6 (smaller files)
+  method: 4
+
+  # encode WEBP cards without loss, much larger files
+  lossless: false
+
+  # scale of the cards sent outside of the info command (claims, last, lists), 1 for full size
+  downscale: 1
+
+  # send small cards (375x500) when browsing with /balls list, /balls last and trades
+  thumbnails: false
+
+  # maximum size in megabytes of the spawn images kept in memory, 0 to disable
+  wild-card-cache-size: 32
+
+  # when a spawn image is uploaded in the admin panel, also save a copy downsized to this
+  # width and height in pixels, which is sent instead of the original. 0 to disable
+  wild-card-max-size: 0
+
+# keep the cached balls, regimes, economies and specials up to date with the admin panel
+catalog-sync:
+
+  # apply the changes made in the admin panel within a second, without /reloadcache
+  listen: true
+
+  # seconds between full reloads of the catalog, in case a change was missed. 0 to disable
+  resync-interval: 3600
+
+# memory used by the spawn cooldowns of the default spawn manager
+spawn-cooldowns:
+
+  # maximum number of guilds with their cooldown kept as objects, the least recently active
+  # ones are compacted beyond that
+  max-active: 10000
+
+  # seconds without messages after which the cooldown of a guild is compacted
+  idle-timeout: 3600
+
+  # seconds without messages after which the cooldown of a guild is forgotten
+  expiry: 1209600
+
+  # file where the cooldowns are saved to be restored after a restart, leave empty to disable
+  # if shard-ids is set, the shard IDs are added to the name: spawn-cooldowns-0-1.bin
+  snapshot-path: spawn-cooldowns.bin
+
+  # seconds between two saves of the cooldowns, in addition to the one on shutdown
+  snapshot-interval: 300
+
+# sending of the spawn messages, done in the background to keep message handling fast
+spawn-dispatch:
+
+  # number of tasks sending the spawn messages
+  workers: 4
+
+  # maximum number of spawns waiting to be sent, new ones are dropped beyond that
+  queue-size: 1000
+
+  # maximum number of spawn messages sent per second across all channels
+  rate: 20
+
+  # minimum number of seconds between two spawns in the same channel
+  channel-interval: 5
+
+  # number of tries to send a spawn message when Discord is rate limiting or unavailable
+  attempts: 3
+
+# split the guilds between several spawn managers to compare them, used when spawn-manager is
+# set to ballsdex.packages.countryballs.experiment.ExperimentSpawner
+spawn-experiment:
+
+  # name of the experiment, changing it reassigns all the guilds
+  name: spawn
+
+  # spawn managers compared, with their share of the enrolled guilds
+  # changing the weights reassigns the guilds of the arm and of the following ones
+  arms:
+    - name: control
+      manager: ballsdex.packages.countryballs.spawn.SpawnManager
+      weight: 50
+    # - name: candidate
+    #   manager: yourpackage.SpawnManager
+    #   weight: 50
+
+  # percentage of the guilds enrolled in the experiment, the others use the default manager
+  # increasing it enrolls more guilds without reassigning the enrolled ones
+  ramp: 100
+
+  # percentage of the guilds never enrolled, kept on the default manager as a reference
+  holdout: 0
+
+  # spawn manager of the guilds not enrolled
+  default-manager: ballsdex.packages.countryballs.spawn.SpawnManager
+
 # sentry details, leave empty if you don't know what this is
 # https://sentry.io/ for error tracking
 sentry:
@@ -379,6 +683,9 @@ catch:
   # the label shown on the catch button
   catch_button_label: "Catch me!"
 
+  # ignore accents in guesses and names, "Pokemon" would catch "Pokémon"
+  fold_accents: false
+
   # the message that appears when a user catches a ball 
   caught_msgs:
     - "{user} You caught **{ball}**!"
@@ -418,6 +725,11 @@ def update_settings(path: "Path"):
     add_sentry = "sentry:" not in content
     add_catch_messages = "catch:" not in content
     add_extra_models = "extra-tortoise-models:" not in content
+    add_card_rendering = "card-rendering:" not in content
+    add_catalog_sync = "catalog-sync:" not in content
+    add_spawn_cooldowns = "spawn-cooldowns:" not in content
+    add_spawn_dispatch = "spawn-dispatch:" not in content
+    add_spawn_experiment = "spawn-experiment:" not in content
 
     for line in content.splitlines():
         if line.startswith("owners:"):
@@ -536,6 +848,9 @@ catch:
   # the label shown on the catch button
   catch_button_label: "Catch me!"
 
+  # ignore accents in guesses and names, "Pokemon" would catch "Pokémon"
+  fold_accents: false
+
   # the message that appears when a user catches a ball
   caught_msgs:
     - "{user} You caught **{ball}**!"
@@ -567,6 +882,151 @@ extra-tortoise-models:
 extra-django-apps:
 """
 
+    if add_card_rendering:
+        content += """
+# card rendering settings
+card-rendering:
+
+  # maximum size in megabytes of the rendered cards kept in memory, 0 to disable
+  memory-cache-size: 64
+
+  # directory where rendered cards are cached on disk, leave empty to disable
+  disk-cache-path:
+
+  # maximum size in megabytes of the rendered cards cached on disk
+  disk-cache-size: 512
+
+  # maximum size in megabytes of the decoded backgrounds, artworks and icons kept in memory
+  asset-cache-size: 256
+
+  # maximum size in megabytes of the pre-drawn cards without stats kept in memory
+  layer-cache-size: 256
+
+  # maximum size in megabytes of the rasterized card texts kept in memory
+  text-cache-size: 64
+
+  # cards are rendered by a pool of workers, either "thread" or "process"
+  # processes use more memory but do not slow down the rest of the bot
+  pool-mode: thread
+
+  # number of workers rendering cards, leave empty to use the number of CPUs
+  pool-workers:
+
+  # maximum number of cards waiting or being rendered, further requests will wait
+  queue-size: 64
+
+  # image format of the cards, "WEBP", "PNG" or "JPEG" (no transparency)
+  format: WEBP
+
+  # quality of WEBP and JPEG cards, from 0 to 100
+  quality: 80
+
+  # WEBP encoding effort, from 0 (faster) to 6 (smaller files)
+  method: 4
+
+  # encode WEBP cards without loss, much larger files
+  lossless: false
+
+  # scale of the cards sent outside of the info command (claims, last, lists), 1 for full size
+  downscale: 1
+
+  # send small cards (375x500) when browsing with /balls list, /balls last and trades
+  thumbnails: false
+
+  # maximum size in megabytes of the spawn images kept in memory, 0 to disable
+  wild-card-cache-size: 32
+
+  # when a spawn image is uploaded in the admin panel, also save a copy downsized to this
+  # width and height in pixels, which is sent instead of the original. 0 to disable
+  wild-card-max-size: 0
+"""
+
+    if add_catalog_sync:
+        content += """
+# keep the cached balls, regimes, economies and specials up to date with the admin panel
+catalog-sync:
+
+  # apply the changes made in the admin panel within a second, without /reloadcache
+  listen: true
+
+  # seconds between full reloads of the catalog, in case a change was missed. 0 to disable
+  resync-interval: 3600
+"""
+
+    if add_spawn_cooldowns:
+        content += """
+# memory used by the spawn cooldowns of the default spawn manager
+spawn-cooldowns:
+
+  # maximum number of guilds with their cooldown kept as objects, the least recently active
+  # ones are compacted beyond that
+  max-active: 10000
+
+  # seconds without messages after which the cooldown of a guild is compacted
+  idle-timeout: 3600
+
+  # seconds without messages after which the cooldown of a guild is forgotten
+  expiry: 1209600
+
+  # file where the cooldowns are saved to be restored after a restart, leave empty to disable
+  # if shard-ids is set, the shard IDs are added to the name: spawn-cooldowns-0-1.bin
+  snapshot-path: spawn-cooldowns.bin
+
+  # seconds between two saves of the cooldowns, in addition to the one on shutdown
+  snapshot-interval: 300
+"""
+
+    if add_spawn_dispatch:
+        content += """
+# sending of the spawn messages, done in the background to keep message handling fast
+spawn-dispatch:
+
+  # number of tasks sending the spawn messages
+  workers: 4
+
+  # maximum number of spawns waiting to be sent, new ones are dropped beyond that
+  queue-size: 1000
+
+  # maximum number of spawn messages sent per second across all channels
+  rate: 20
+
+  # minimum number of seconds between two spawns in the same channel
+  channel-interval: 5
+
+  # number of tries to send a spawn message when Discord is rate limiting or unavailable
+  attempts: 3
+"""
+
+    if add_spawn_experiment:
+        content += """
+# split the guilds between several spawn managers to compare them, used when spawn-manager is
+# set to ballsdex.packages.countryballs.experiment.ExperimentSpawner
+spawn-experiment:
+
+  # name of the experiment, changing it reassigns all the guilds
+  name: spawn
+
+  # spawn managers compared, with their share of the enrolled guilds
+  # changing the weights reassigns the guilds of the arm and of the following ones
+  arms:
+    - name: control
+      manager: ballsdex.packages.countryballs.spawn.SpawnManager
+      weight: 50
+    # - name: candidate
+    #   manager: yourpackage.SpawnManager
+    #   weight: 50
+
+  # percentage of the guilds enrolled in the experiment, the others use the default manager
+  # increasing it enrolls more guilds without reassigning the enrolled ones
+  ramp: 100
+
+  # percentage of the guilds never enrolled, kept on the default manager as a reference
+  holdout: 0
+
+  # spawn manager of the guilds not enrolled
+  default-manager: ballsdex.packages.countryballs.spawn.SpawnManager
+"""
+
     if any(
         (
             add_owners,
@@ -582,6 +1042,11 @@ extra-django-apps:
             add_sentry,
             add_catch_messages,
             add_extra_models,
+            add_card_rendering,
+            add_catalog_sync,
+            add_spawn_cooldowns,
+            add_spawn_dispatch,
+            add_spawn_experiment,
         )
     ):
         path.write_text(content)